@@ -4,132 +4,216 @@ TXT to Markdown 格式化工具
 智能识别文本结构并转换为 markdown 格式
 """
 
+import contextlib
+import os
 import re
+import secrets
+import shutil
 import sys
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, TextIO, Tuple, Optional
+
+# 流式读写文件时使用的缓冲区大小
+_IO_BUFFER_SIZE = 64 * 1024
+
+# 带冒号标题的常见关键词
+_TITLE_KEYWORDS = frozenset({'INTRODUCTION', 'INSTALLATION', 'USAGE', 'CONCLUSION', 'OVERVIEW', 'DESCRIPTION'})
+
+def _split_lines(stream: Iterable[str]) -> Iterator[str]:
+    """逐行读取文本流，切分结果与 str.split('\\n') 一致"""
+    line = ''
+    for line in stream:
+        yield line[:-1] if line.endswith('\n') else line
+    # 以换行结尾（或为空）的文本最后还有一个空行
+    if line == '' or line.endswith('\n'):
+        yield ''
+
+@contextlib.contextmanager
+def _atomic_output(output_path: Path, buffering: int = -1) -> Iterator[TextIO]:
+    """写入同目录下的临时文件，成功后再替换目标文件；出错时删除临时文件，已有的输出保持不变"""
+    tmp_path = output_path.with_name(f'.{output_path.name}.{secrets.token_hex(4)}.tmp')
+    try:
+        with open(tmp_path, 'x', encoding='utf-8', buffering=buffering) as f:
+            yield f
+        # 覆盖已有文件时保留其权限
+        if output_path.exists():
+            shutil.copymode(output_path, tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+# 格式化规则，在模块导入时编译一次，由所有实例共享
+_RULES = {
+    'headers': [
+        (re.compile(r'^([A-Z]{2,})\s*$'), r'# \1'),  # 全大写且较短的标题
+        (re.compile(r'^([A-Z][A-Za-z\s]+[.:])\s*$'), r'## \1'),  # 带标点的标题
+    ],
+    'lists': [
+        (re.compile(r'^(\s*)[-*+]\s+(.+)$'), r'\1- \2'),  # 无序列表
+        (re.compile(r'^(\s*)(\d+)\.\s+(.+)$'), r'\1\2. \3'),  # 有序列表
+        (re.compile(r'^(\s*)([•○▪▫])\s+(.+)$'), r'\1- \3'),  # 其他符号列表
+    ],
+    'code_blocks': [
+        (re.compile(r'^( {4}|\t)(.+)$'), r'    \2'),  # 缩进代码块
+    ],
+    # 斜体、粗体和行内代码已是 markdown 语法，原样保留即可，不需要恒等替换
+    'emphasis': [],
+    'links': [
+        (re.compile(r'(https?://[^\s]+)'), r'[\1](\1)'),  # URL 链接
+        (re.compile(r'(\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'), r'[\1](mailto:\1)'),  # 邮箱
+    ],
+}
+
+def _build_inline_pattern(inline_rules: List[Tuple[re.Pattern, str]]) -> Tuple[re.Pattern, List[str]]:
+    """将多条规则合并为一个带命名分组的联合正则，返回联合正则及对应的替换模板"""
+    alternatives = []
+    replacements = []
+    group_offset = 1
+    for index, (pattern, replacement) in enumerate(inline_rules):
+        alternatives.append(f'(?P<r{index}>{pattern.pattern})')
+        # 把替换模板中的分组编号平移到联合正则中的对应位置
+        replacements.append(
+            re.sub(r'\\(\d+)', lambda m: f'\\g<{int(m.group(1)) + group_offset}>', replacement)
+        )
+        group_offset += pattern.groups + 1
+    return re.compile('|'.join(alternatives)), replacements
+
+# 强调与链接规则合并后的联合正则，每行只需扫描一次
+_INLINE_PATTERN, _INLINE_REPLACEMENTS = _build_inline_pattern(_RULES['emphasis'] + _RULES['links'])
+
+# 行首结构的统一分类：代码块起始（围栏或缩进）与列表标记，一次匹配即可确定行类型
+_LINE_START_RE = re.compile(r'(?P<code>```|~~~| {4}|\t|\s+(?:```|~~~))|(?P<list>\s*(?:[-*+•○▪▫]|\d+\.)\s)')
+
+# 列表规则按行首第一个非空白字符分派，每行最多只需尝试一条规则
+_UNORDERED_LIST_RULE, _ORDERED_LIST_RULE, _SYMBOL_LIST_RULE = _RULES['lists']
+_LIST_RULES_BY_MARKER = {
+    **{marker: _UNORDERED_LIST_RULE for marker in '-*+'},
+    **{marker: _SYMBOL_LIST_RULE for marker in '•○▪▫'},
+}
+
+# 任一联合规则命中时行内必然包含的标记，用于跳过无需格式化的行
+_INLINE_MARKERS = ('http://', 'https://', '@')
 
 class TxtToMarkdownFormatter:
     def __init__(self):
-        self.rules = {
-            'headers': [
-                (r'^([A-Z]{2,})\s*$', r'# \1'),  # 全大写且较短的标题
-                (r'^([A-Z][A-Za-z\s]+[.:])\s*$', r'## \1'),  # 带标点的标题
-            ],
-            'lists': [
-                (r'^(\s*)[-*+]\s+(.+)$', r'\1- \2'),  # 无序列表
-                (r'^(\s*)(\d+)\.\s+(.+)$', r'\1\2. \3'),  # 有序列表
-                (r'^(\s*)([•○▪▫])\s+(.+)$', r'\1- \3'),  # 其他符号列表
-            ],
-            'code_blocks': [
-                (r'^( {4}|\t)(.+)$', r'    \2'),  # 缩进代码块
-            ],
-            'emphasis': [
-                (r'\*([^*\n]+)\*', r'*\1*'),  # 斜体
-                (r'\*\*([^*\n]+)\*\*', r'**\1**'),  # 粗体
-                (r'`([^`\n]+)`', r'`\1`'),  # 行内代码
-            ],
-            'links': [
-                (r'(https?://[^\s]+)', r'[\1](\1)'),  # URL 链接
-                (r'(\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)', r'[\1](mailto:\1)'),  # 邮箱
-            ],
-        }
+        # 引用模块级的已编译规则，创建实例无需重新编译
+        self.rules = _RULES
+        self._inline_pattern = _INLINE_PATTERN
+        self._inline_replacements = _INLINE_REPLACEMENTS
+        self._inline_markers = _INLINE_MARKERS
+        self._list_rules_by_marker = _LIST_RULES_BY_MARKER
+        self._line_start_pattern = _LINE_START_RE
+        self._ordered_list_rule = _ORDERED_LIST_RULE
 
     def detect_structure(self, lines: List[str]) -> List[str]:
         """检测文本结构并应用相应的格式化规则"""
-        formatted_lines = []
-        i = 0
+        return list(self.iter_format(lines))
+
+    def iter_format(self, line_iter: Iterable[str], *, detect_code: bool = True,
+                    detect_tables: bool = True) -> Iterator[str]:
+        """逐行格式化文本，只在处理代码块或表格时缓存整块内容
 
-        while i < len(lines):
-            line = lines[i].rstrip()
-            next_line = lines[i + 1].rstrip() if i + 1 < len(lines) else ""
+        调用方确定文本中不含代码块或表格时，可关闭对应的逐行检测
+        """
+        lines = iter(line_iter)
+        prev_empty = False
 
-            # 跳过空行
-            if not line.strip():
-                formatted_lines.append("")
-                i += 1
+        # 逐行循环是解释器开销的热点，预先把方法绑定到局部变量
+        match_line_start = self._line_start_pattern.match
+        is_table_line = self._is_table_line
+        apply_header_formatting = self._apply_header_formatting
+        is_header = self._is_header
+        apply_list_formatting = self._apply_list_formatting
+        apply_inline_formatting = self._apply_inline_formatting
+
+        raw_line = next(lines, None)
+        while raw_line is not None:
+            next_raw_line = next(lines, None)
+            line = raw_line.rstrip()
+
+            # 跳过空行，连续的空行只保留一个
+            if not line:
+                if not prev_empty:
+                    yield ""
+                    prev_empty = True
+                raw_line = next_raw_line
                 continue
 
-            # 检测并处理代码块
-            if self._is_code_block(line, lines, i):
-                code_lines = self._extract_code_block(lines, i)
-                formatted_lines.extend(code_lines)
-                i += len(code_lines)
+            # 对行首结构分类
+            match = match_line_start(line)
+            kind = match.lastgroup if match else None
+
+            # 检测并处理代码块，代码块内的连续空行同样只保留一个
+            # 行首为围栏标记或缩进；缩进块之前的引导行按普通文本处理，代码块从第一个缩进行开始
+            if detect_code and kind == 'code':
+                code_lines, raw_line = self._extract_code_block(raw_line, next_raw_line, lines)
+                for code_line in code_lines:
+                    if code_line.strip():
+                        yield code_line
+                        prev_empty = False
+                    elif not prev_empty:
+                        yield ""
+                        prev_empty = True
                 continue
 
             # 检测并处理表格
-            if self._is_table_line(line):
-                table_lines = self._extract_table(lines, i)
-                formatted_lines.extend(table_lines)
-                i += len(table_lines)
+            if detect_tables and is_table_line(line):
+                table_lines, raw_line = self._extract_table(line, next_raw_line, lines)
+                yield from table_lines
+                prev_empty = False
                 continue
 
             # 应用标题格式化
-            formatted_line = self._apply_header_formatting(line)
-
-            # 应用列表格式化
-            if not self._is_header(formatted_line):
-                formatted_line = self._apply_list_formatting(formatted_line)
-
-            # 应用其他格式化
-            formatted_line = self._apply_emphasis_formatting(formatted_line)
-            formatted_line = self._apply_link_formatting(formatted_line)
-
-            formatted_lines.append(formatted_line)
-            i += 1
+            formatted_line = apply_header_formatting(line)
 
-        return formatted_lines
+            # 应用列表格式化，只有带列表标记的行才可能匹配列表规则
+            if kind == 'list' and not is_header(formatted_line):
+                formatted_line = apply_list_formatting(formatted_line)
 
-    def _is_code_block(self, line: str, lines: List[str], index: int) -> bool:
-        """检测是否为代码块开始"""
-        stripped = line.lstrip()
-        if stripped.startswith(('```', '~~~')):
-            return True
-
-        # 检测连续的缩进行
-        if line.startswith('    ') or line.startswith('\t'):
-            return True
-
-        # 检测接下来的行是否也是缩进
-        if index + 1 < len(lines):
-            next_line = lines[index + 1]
-            if (next_line.startswith('    ') or next_line.startswith('\t')) and next_line.strip():
-                return True
-
-        return False
+            # 应用强调和链接格式化
+            yield apply_inline_formatting(formatted_line)
+            prev_empty = False
+            raw_line = next_raw_line
 
-    def _extract_code_block(self, lines: List[str], start_index: int) -> List[str]:
-        """提取代码块"""
+    def _extract_code_block(self, first_line: str, next_line: Optional[str],
+                            lines: Iterator[str]) -> Tuple[List[str], Optional[str]]:
+        """提取代码块，返回代码块各行以及代码块之后的第一行"""
         code_lines = []
-        i = start_index
+        line = next_line
 
-        # 检测代码块类型
-        line = lines[i]
-        if line.startswith('```') or line.startswith('~~~'):
+        # 检测代码块类型，围栏标记前可以有缩进
+        stripped_first = first_line.lstrip()
+        if stripped_first.startswith(('```', '~~~')):
             # fenced code block
-            fence = line[:3]
-            code_lines.append(line)
-            i += 1
-
-            while i < len(lines) and not lines[i].startswith(fence):
-                code_lines.append(lines[i])
-                i += 1
+            fence = stripped_first[:3]
+            append = code_lines.append
+            append(first_line)
+
+            # 直接 for 循环消费剩余行，围栏只有三个字符，用切片比较代替 startswith
+            if line is not None and line.lstrip()[:3] != fence:
+                append(line)
+                for line in lines:
+                    if line.lstrip()[:3] == fence:
+                        break
+                    append(line)
+                else:
+                    line = None
 
-            if i < len(lines):
-                code_lines.append(lines[i])
-                i += 1
+            if line is not None:
+                append(line)
+                line = next(lines, None)
         else:
-            # 缩进代码块
+            # 缩进代码块，包含起始行及其后连续的缩进行和空行
             code_lines.append('```')
-            while i < len(lines) and (lines[i].startswith('    ') or lines[i].startswith('\t') or not lines[i].strip()):
-                if lines[i].strip():
-                    code_lines.append(lines[i].rstrip())
-                else:
-                    code_lines.append('')
-                i += 1
+            code_lines.append(first_line.rstrip())
+            while line is not None and (line.startswith(('    ', '\t')) or not line.strip()):
+                code_lines.append(line.rstrip())
+                line = next(lines, None)
             code_lines.append('```')
 
-        return code_lines
+        return code_lines, line
 
     def _is_table_line(self, line: str) -> bool:
         """检测是否为表格行"""
@@ -137,35 +221,42 @@ class TxtToMarkdownFormatter:
         if '|' not in line:
             return False
 
-        parts = [p.strip() for p in line.split('|') if p.strip()]
-        return len(parts) >= 2
+        # 找到两个非空列即可返回，不必构造去除空白后的列列表
+        columns = 0
+        for part in line.split('|'):
+            if part and not part.isspace():
+                columns += 1
+                if columns >= 2:
+                    return True
+        return False
 
-    def _extract_table(self, lines: List[str], start_index: int) -> List[str]:
-        """提取表格"""
-        table_lines = []
-        i = start_index
+    def _extract_table(self, first_line: str, next_line: Optional[str],
+                       lines: Iterator[str]) -> Tuple[List[str], Optional[str]]:
+        """提取表格，返回表格各行以及表格之后的第一行"""
+        table_lines = [first_line]
+        line = next_line
 
-        while i < len(lines) and self._is_table_line(lines[i]):
-            table_lines.append(lines[i].rstrip())
-            i += 1
+        while line is not None and self._is_table_line(line):
+            table_lines.append(line.rstrip())
+            line = next(lines, None)
 
-        return table_lines
+        return table_lines, line
 
     def _apply_header_formatting(self, line: str) -> str:
         """应用标题格式化"""
         # 只对全大写的简短行应用标题格式
         stripped = line.strip()
-        if stripped.isupper() and len(stripped) < 50 and ' ' not in stripped or stripped.count(' ') <= 3:
+        # 先用 C 实现的字符串方法排除绝大多数行，逐字符检查只在候选行上执行
+        if len(stripped) < 50 and stripped.count(' ') <= 3 and stripped.isupper():
             if all(c.isupper() or c.isspace() for c in stripped):
                 return f"# {stripped}"
 
         # 检测带冒号的标题
         if stripped.endswith(':') and len(stripped) < 60:
             # 检查是否是标题（包含常见标题关键词）
-            title_keywords = ['INTRODUCTION', 'INSTALLATION', 'USAGE', 'CONCLUSION', 'OVERVIEW', 'DESCRIPTION']
-            for keyword in title_keywords:
-                if keyword in stripped.upper():
-                    return f"## {stripped}"
+            upper = stripped.upper()
+            if any(keyword in upper for keyword in _TITLE_KEYWORDS):
+                return f"## {stripped}"
 
         return line
 
@@ -175,42 +266,52 @@ class TxtToMarkdownFormatter:
 
     def _apply_list_formatting(self, line: str) -> str:
         """应用列表格式化"""
-        for pattern, replacement in self.rules['lists']:
-            if re.match(pattern, line):
-                return re.sub(pattern, replacement, line)
-        return line
-
-    def _apply_emphasis_formatting(self, line: str) -> str:
-        """应用强调格式化"""
-        for pattern, replacement in self.rules['emphasis']:
-            line = re.sub(pattern, replacement, line)
-        return line
-
-    def _apply_link_formatting(self, line: str) -> str:
-        """应用链接格式化"""
-        for pattern, replacement in self.rules['links']:
-            line = re.sub(pattern, replacement, line)
-        return line
+        stripped = line.lstrip()
+        if not stripped:
+            return line
+
+        # 按首个非空白字符选出唯一可能匹配的规则，与正则中 \d 一致地用 isdecimal 判断数字
+        first = stripped[0]
+        rule = self._list_rules_by_marker.get(first)
+        if rule is None:
+            if not first.isdecimal():
+                return line
+            rule = self._ordered_list_rule
+
+        # 列表规则整行锚定，直接展开匹配结果，无需再次扫描
+        pattern, replacement = rule
+        match = pattern.match(line)
+        return match.expand(replacement) if match else line
+
+    def _apply_inline_formatting(self, line: str) -> str:
+        """应用强调和链接格式化"""
+        # 普通文本行通常不含任何标记，直接跳过正则扫描
+        if not any(marker in line for marker in self._inline_markers):
+            return line
+        return self._inline_pattern.sub(self._expand_inline_match, line)
+
+    def _expand_inline_match(self, match: re.Match) -> str:
+        """按命中的规则展开替换模板"""
+        return match.expand(self._inline_replacements[int(match.lastgroup[1:])])
 
     def format_text(self, text: str) -> str:
         """格式化文本内容"""
-        lines = text.split('\n')
-        formatted_lines = self.detect_structure(lines)
+        # 与文本模式读取文件时一样把 \r\n 和 \r 统一为 \n，只按 \n 切分，
+        # 使 format_text 与 format_file 对同一内容的结果一致，下面的预扫描也只需考虑 \n
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        # 整段文本一次子串查找即可排除代码块和表格，大多数纯文本可跳过逐行检测
+        detect_code = (
+            '```' in text or '~~~' in text or '\n    ' in text or '\n\t' in text
+            or text.startswith(('    ', '\t'))
+        )
+        detect_tables = '|' in text
 
-        # 清理多余的空行
-        cleaned_lines = []
-        prev_empty = False
-
-        for line in formatted_lines:
-            if line.strip() == "":
-                if not prev_empty:
-                    cleaned_lines.append("")
-                prev_empty = True
-            else:
-                cleaned_lines.append(line)
-                prev_empty = False
+        lines = text.split('\n')
 
-        return '\n'.join(cleaned_lines)
+        # 连续空行已在 iter_format 中合并
+        return '\n'.join(self.iter_format(lines, detect_code=detect_code, detect_tables=detect_tables))
 
     def format_file(self, input_path: str, output_path: Optional[str] = None) -> str:
         """格式化文件"""
@@ -219,25 +320,28 @@ class TxtToMarkdownFormatter:
         if not input_file.exists():
             raise FileNotFoundError(f"输入文件不存在: {input_path}")
 
-        # 读取输入文件
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # 格式化内容
-        formatted_content = self.format_text(content)
-
         # 确定输出路径
         if output_path is None:
             output_path = input_file.with_suffix('.md')
         else:
             output_path = Path(output_path)
 
-        # 写入输出文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(formatted_content)
+        # 边读边写，内存占用只与最大的代码块或表格有关；先写入临时文件，
+        # 全部成功后才替换输出文件，因此输出覆盖输入文件或中途解码失败都是安全的
+        with open(input_file, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as src, \
+                _atomic_output(output_path, _IO_BUFFER_SIZE) as dst:
+            formatted_lines = self.iter_format(_split_lines(src))
+            dst.write(next(formatted_lines, ''))
+            for formatted_line in formatted_lines:
+                dst.write('\n')
+                dst.write(formatted_line)
 
         return str(output_path)
 
+    def format_files(self, input_paths: Iterable[str]) -> List[str]:
+        """批量格式化多个文件，复用同一个格式化器实例"""
+        return [self.format_file(input_path) for input_path in input_paths]
+
 def main():
     """主函数"""
     if len(sys.argv) < 2:
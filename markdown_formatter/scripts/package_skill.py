@@ -4,12 +4,45 @@
 将技能目录打包为可分发的 zip 文件
 """
 
+import contextlib
+import mmap
 import os
+import re
 import sys
 import zipfile
 import yaml
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, BinaryIO, ContextManager, Dict, Iterator, List, Set, Union
+
+# 优先使用 libyaml 提供的 C 实现加载器
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# SKILL.md 开头由独占一行的 --- 包围的 YAML frontmatter；结束的 --- 必须位于行首，
+# 否则空 frontmatter 会越过真正的结束行，一直匹配到正文中的分隔线
+_FRONTMATTER_RE = re.compile(rb'\A---\r?\n(.*?)^---', re.MULTILINE | re.DOTALL)
+
+# 技能名称只允许小写字母、数字和连字符
+_SKILL_NAME_RE = re.compile(r'^[a-z0-9-]+$')
+
+def _map_file(f: BinaryIO) -> ContextManager[Union[mmap.mmap, bytes]]:
+    """以只读方式映射整个文件；空文件无法映射，返回空字节串"""
+    if os.fstat(f.fileno()).st_size == 0:
+        return contextlib.nullcontext(b'')
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _find_referenced_names(content: Union[mmap.mmap, bytes], names: List[str]) -> Set[str]:
+    """在一次扫描中找出内容里出现过的文件名"""
+    if not names:
+        return set()
+
+    encoded = {name.encode('utf-8'): name for name in names}
+    # 零宽前瞻使每个位置都参与匹配，同一位置优先匹配较长的名称
+    alternatives = b'|'.join(re.escape(name) for name in sorted(encoded, key=len, reverse=True))
+    pattern = re.compile(b'(?=(' + alternatives + b'))')
+    found = {encoded[match.group(1)] for match in pattern.finditer(content)}
+
+    # 被更长名称包含的短名称在同一位置不会单独命中，但同样出现在内容中
+    return found | {name for name in names if any(name in other for other in found)}
 
 class SkillPackageValidator:
     """技能验证器"""
@@ -18,6 +51,8 @@ class SkillPackageValidator:
         self.skill_path = Path(skill_path)
         self.errors = []
         self.warnings = []
+        # validate_skill_metadata 解析出的 frontmatter，供打包时复用
+        self.metadata = None
 
     def validate_skill_structure(self) -> bool:
         """验证技能结构"""
@@ -38,23 +73,28 @@ class SkillPackageValidator:
         skill_md = self.skill_path / "SKILL.md"
 
         try:
-            with open(skill_md, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # 只扫描到 frontmatter 结束处，正文再长也不会整体读入内存
+            with open(skill_md, 'rb') as f, _map_file(f) as content:
+                has_frontmatter = content[:3] == b'---'
+                match = _FRONTMATTER_RE.match(content)
+                frontmatter = match.group(1).decode('utf-8') if match else None
 
             # 检查是否包含 YAML frontmatter
-            if not content.startswith('---'):
+            if not has_frontmatter:
                 self.errors.append("SKILL.md 必须以 YAML frontmatter 开始")
                 return False
 
             # 解析 frontmatter
             try:
-                end_index = content.find('---', 3)
-                if end_index == -1:
+                if frontmatter is None:
                     self.errors.append("YAML frontmatter 格式不正确")
                     return False
 
-                frontmatter = content[3:end_index].strip()
-                metadata = yaml.safe_load(frontmatter)
+                metadata = yaml.load(frontmatter, Loader=_YAML_LOADER)
+                if not isinstance(metadata, dict):
+                    self.errors.append("YAML frontmatter 格式不正确")
+                    return False
+                self.metadata = metadata
 
                 # 检查必需字段
                 required_fields = ['name', 'description']
@@ -67,7 +107,7 @@ class SkillPackageValidator:
                 # 检查字段质量
                 if 'name' in metadata:
                     name = metadata['name']
-                    if not re.match(r'^[a-z0-9-]+$', name):
+                    if not _SKILL_NAME_RE.match(name):
                         self.warnings.append("技能名称应该只包含小写字母、数字和连字符")
 
                 if 'description' in metadata:
@@ -108,22 +148,24 @@ class SkillPackageValidator:
         skill_md = self.skill_path / "SKILL.md"
 
         try:
-            with open(skill_md, 'r', encoding='utf-8') as f:
-                content = f.read()
+            scripts_dir = self.skill_path / "scripts"
+            script_names = [p.name for p in scripts_dir.glob("*.py")] if scripts_dir.exists() else []
+            refs_dir = self.skill_path / "references"
+            ref_names = [p.name for p in refs_dir.glob("*.md")] if refs_dir.exists() else []
+
+            # 一次扫描找出所有被引用的文件名
+            with open(skill_md, 'rb') as f, _map_file(f) as content:
+                referenced = _find_referenced_names(content, script_names + ref_names)
 
             # 检查脚本文件引用
-            scripts_dir = self.skill_path / "scripts"
-            if scripts_dir.exists():
-                for script_file in scripts_dir.glob("*.py"):
-                    if script_file.name not in content:
-                        self.warnings.append(f"脚本文件 {script_file.name} 未在 SKILL.md 中引用")
+            for name in script_names:
+                if name not in referenced:
+                    self.warnings.append(f"脚本文件 {name} 未在 SKILL.md 中引用")
 
             # 检查引用文件
-            refs_dir = self.skill_path / "references"
-            if refs_dir.exists():
-                for ref_file in refs_dir.glob("*.md"):
-                    if ref_file.name not in content:
-                        self.warnings.append(f"引用文件 {ref_file.name} 未在 SKILL.md 中引用")
+            for name in ref_names:
+                if name not in referenced:
+                    self.warnings.append(f"引用文件 {name} 未在 SKILL.md 中引用")
 
         except Exception as e:
             self.errors.append(f"验证文件引用失败: {e}")
@@ -138,6 +180,21 @@ class SkillPackageValidator:
             'warnings': self.warnings
         }
 
+def _iter_files(directory: str) -> Iterator[str]:
+    """按 os.walk 的顺序递归产出目录下的文件路径，复用 scandir 缓存的类型信息"""
+    subdirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                # 与 os.walk 一致，不进入指向目录的符号链接
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            else:
+                yield entry.path
+
+    for subdir in subdirs:
+        yield from _iter_files(subdir)
+
 def package_skill(skill_path: str, output_dir: str = ".") -> bool:
     """打包技能"""
     skill_dir = Path(skill_path).resolve()
@@ -177,29 +234,19 @@ def package_skill(skill_path: str, output_dir: str = ".") -> bool:
     # 如果验证通过，打包技能
     print("\n✅ 验证通过，正在打包...")
 
-    # 获取技能名称
-    skill_md = skill_dir / "SKILL.md"
-    with open(skill_md, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    try:
-        end_index = content.find('---', 3)
-        frontmatter = content[3:end_index].strip()
-        metadata = yaml.safe_load(frontmatter)
-        skill_name = metadata.get('name', skill_dir.name)
-    except:
-        skill_name = skill_dir.name
+    # 获取技能名称，复用验证时已解析的元数据
+    metadata = validator.metadata
+    skill_name = metadata.get('name', skill_dir.name) if isinstance(metadata, dict) else skill_dir.name
 
     # 创建输出文件路径
     output_path = Path(output_dir) / f"{skill_name}.zip"
 
     # 创建 zip 文件
+    # 归档名直接按前缀长度切片得到，避免逐个文件构造 Path 再求相对路径
+    prefix_len = len(str(skill_dir)) + 1
     with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for root, dirs, files in os.walk(skill_dir):
-            for file in files:
-                file_path = Path(root) / file
-                arc_path = file_path.relative_to(skill_dir)
-                zf.write(file_path, arc_path)
+        for file_path in _iter_files(str(skill_dir)):
+            zf.write(file_path, file_path[prefix_len:])
 
     print(f"📦 技能已打包: {output_path}")
     print(f"📊 打包大小: {output_path.stat().st_size} 字节")
@@ -219,5 +266,4 @@ def main():
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
-    import re
     main()
\ No newline at end of file
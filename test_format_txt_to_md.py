@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+TXT to Markdown 格式化工具测试脚本
+测试格式化结果以及文件读写行为
+"""
+
+import os
+import tempfile
+import sys
+from pathlib import Path
+
+# 添加技能脚本目录到Python路径（测试放在技能目录之外，不会被打包）
+sys.path.insert(0, str(Path(__file__).parent / 'markdown_formatter' / 'scripts'))
+
+from format_txt_to_md import TxtToMarkdownFormatter
+
+
+def _report(checks, name, actual) -> bool:
+    """打印各项检查结果"""
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print(f"✅ {name}测试通过")
+        return True
+    else:
+        print(f"❌ {name}测试失败")
+        print("实际结果:")
+        print(actual)
+        return False
+
+
+def test_indented_code_block():
+    """测试缩进代码块的识别范围"""
+    print("🧪 测试缩进代码块...")
+
+    test_content = """Example:
+    x = 1
+    y = 2
+after one
+after two
+after three"""
+
+    formatter = TxtToMarkdownFormatter()
+    result = formatter.format_text(test_content)
+
+    checks = [
+        # 引导行按普通文本输出，代码块从第一个缩进行开始
+        (result.startswith("Example:\n```\n    x = 1\n"), "引导行位于代码块之前"),
+        ("```\nExample:" not in result, "引导行不在代码块内"),
+        # 代码块之后的行全部保留
+        (result.endswith("    y = 2\n```\nafter one\nafter two\nafter three"), "代码块之后的行不丢失"),
+    ]
+    return _report(checks, "缩进代码块", result)
+
+
+def test_indented_fenced_code_block():
+    """测试带缩进的围栏代码块"""
+    print("🧪 测试缩进围栏代码块...")
+
+    test_content = "Intro\n  ```python\n  x = 1\n\n\n  y = 2\n  ```\nafter"
+
+    formatter = TxtToMarkdownFormatter()
+    result = formatter.format_text(test_content)
+
+    checks = [
+        # 整个围栏块原样保留，不会逐行包成多个代码块
+        (result == "Intro\n  ```python\n  x = 1\n\n  y = 2\n  ```\nafter", "围栏块作为一个代码块输出"),
+        (result.count("```") == 2, "不额外添加围栏标记"),
+    ]
+    return _report(checks, "缩进围栏代码块", result)
+
+
+def test_batch_and_streaming_format():
+    """测试批量格式化与逐行格式化接口"""
+    print("🧪 测试批量格式化...")
+
+    contents = [
+        "OVERVIEW\n- item\n访问 https://example.com",
+        "Example:\n    x = 1\n\n\n\nend",
+        "a | b\nc | d\nplain text\n",
+        "",
+    ]
+
+    formatter = TxtToMarkdownFormatter()
+    expected = [formatter.format_text(content) for content in contents]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_paths = []
+        for index, content in enumerate(contents):
+            input_path = Path(work_dir) / f"batch{index}.txt"
+            input_path.write_text(content, encoding='utf-8')
+            input_paths.append(str(input_path))
+
+        output_paths = formatter.format_files(input_paths)
+        outputs = [Path(path).read_text(encoding='utf-8') for path in output_paths]
+
+    iter_results = ['\n'.join(formatter.iter_format(content.split('\n'))) for content in contents]
+
+    checks = [
+        (output_paths == [str(Path(path).with_suffix('.md')) for path in input_paths], "输出路径与输入顺序一致"),
+        (outputs == expected, "批量格式化结果与 format_text 一致"),
+        (iter_results == expected, "iter_format 逐行结果与 format_text 一致"),
+    ]
+    return _report(checks, "批量格式化", outputs)
+
+
+def test_failed_format_keeps_output():
+    """测试输入解码失败时已有的输出文件保持不变"""
+    print("🧪 测试格式化失败时的输出文件...")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_file = Path(work_dir) / "input.txt"
+        output_file = Path(work_dir) / "prev.md"
+        # 无效的 UTF-8 字节位于文件后部，此时已有部分内容被格式化
+        input_file.write_bytes(b"valid line\n" * 10000 + b"\xff\xfe invalid\n")
+        output_file.write_text("keep me\n", encoding='utf-8')
+
+        formatter = TxtToMarkdownFormatter()
+        try:
+            formatter.format_file(str(input_file), str(output_file))
+            raised = False
+        except UnicodeDecodeError:
+            raised = True
+
+        output = output_file.read_text(encoding='utf-8')
+        remaining = sorted(os.listdir(work_dir))
+
+    checks = [
+        (raised, "解码错误向调用方抛出"),
+        (output == "keep me\n", "已有输出文件内容不变"),
+        (remaining == ["input.txt", "prev.md"], "不残留临时文件"),
+    ]
+    return _report(checks, "格式化失败", (output, remaining))
+
+
+def test_format_file_in_place():
+    """测试输出路径与输入路径相同时的格式化"""
+    print("🧪 测试原地格式化...")
+
+    content = "OVERVIEW\n访问 https://example.com 获取更多信息\n"
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_file = Path(work_dir) / "notes.txt"
+        input_file.write_text(content, encoding='utf-8')
+
+        formatter = TxtToMarkdownFormatter()
+        formatter.format_file(str(input_file), str(input_file))
+        result = input_file.read_text(encoding='utf-8')
+
+    checks = [
+        (result == formatter.format_text(content), "与 format_text 结果一致"),
+        ("# OVERVIEW" in result, "标题格式化"),
+    ]
+    return _report(checks, "原地格式化", result)
+
+
+def test_text_and_file_line_splitting():
+    """测试 format_text 与 format_file 对同一内容按相同的换行符切分"""
+    print("🧪 测试换行符处理...")
+
+    samples = [
+        # \x1c、\x0c 等字符不是换行符，行保持完整
+        "LINE ONE\x1cTWO\npage\x0cbreak\n",
+        # 只用 \r 换行的缩进代码块
+        "intro\r    x = 1\r    y = 2\rend",
+        "HELLO\r\nworld\r\n",
+    ]
+
+    formatter = TxtToMarkdownFormatter()
+    checks = []
+    results = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for index, content in enumerate(samples):
+            input_file = Path(work_dir) / f"sample{index}.txt"
+            input_file.write_bytes(content.encode('utf-8'))
+            output_file = formatter.format_file(str(input_file))
+            file_result = Path(output_file).read_text(encoding='utf-8')
+            text_result = formatter.format_text(content)
+            results.append((text_result, file_result))
+            checks.append((text_result == file_result, f"样例 {index + 1} 的 format_text 与 format_file 一致"))
+
+    text_result = results[1][0]
+    checks.append(("    x = 1\n    y = 2\n```\nend" in text_result, "\\r 换行的缩进行识别为代码块"))
+    checks.append((results[0][0].count('#') == 1, "控制字符不拆分行"))
+
+    return _report(checks, "换行符处理", results)
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("🚀 开始运行 TXT to Markdown 格式化工具测试套件\n")
+
+    tests = [
+        test_indented_code_block,
+        test_indented_fenced_code_block,
+        test_batch_and_streaming_format,
+        test_failed_format_keeps_output,
+        test_format_file_in_place,
+        test_text_and_file_line_splitting,
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+            print()  # 空行分隔
+        except Exception as e:
+            print(f"❌ 测试异常: {e}\n")
+
+    print("=" * 60)
+    print(f"📊 测试结果: {passed}/{total} 通过")
+
+    if passed == total:
+        print("🎉 所有测试通过！")
+    else:
+        print("⚠️  部分测试失败，请检查相关功能。")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作规划整合工具测试脚本
+固定示例子规划的匹配结果，防止匹配算法的改动悄悄改变整合文档
+"""
+
+import os
+import shutil
+import tempfile
+import sys
+from pathlib import Path
+
+# 添加技能脚本目录到Python路径（测试放在技能目录之外，不会被打包）
+sys.path.insert(0, str(Path(__file__).parent / 'work-plan-merger' / 'scripts'))
+
+from merge_plans import PlanMerger, _PARALLEL_LOAD_MIN_FILES
+
+EXAMPLES_DIR = Path(__file__).parent / 'work-plan-merger' / 'assets' / 'examples'
+MASTER_FILE = EXAMPLES_DIR / '总纲_年度规划.md'
+
+
+def test_example_section_assignment():
+    """测试示例子规划被分配到的总纲章节"""
+    print("🧪 测试示例子规划的章节分配...")
+
+    # 子规划名称 -> (章节索引, 章节标题)
+    expected = {
+        'README': (1, '一、总体战略目标'),
+        '技术研发规划': (0, '2024年度公司工作规划总纲'),
+        '市场拓展策略': (4, '二、主要工作领域'),
+    }
+
+    with tempfile.NamedTemporaryFile(suffix='.md', delete=False) as f:
+        output_file = f.name
+
+    try:
+        merger = PlanMerger()
+        report = merger.merge_plans(str(MASTER_FILE), str(EXAMPLES_DIR), output_file)
+    finally:
+        if os.path.exists(output_file):
+            os.unlink(output_file)
+
+    actual = {
+        m['subplan']: (m['section_index'], m['section_title'])
+        for m in report['matching_details']
+    }
+
+    checks = [
+        (merger.matching_rules['text_backend'] == 'difflib', "默认使用 difflib 文本相似度后端"),
+        (not report['unmatched_subplans'], "所有示例子规划均已匹配"),
+    ]
+    for name, section in expected.items():
+        checks.append((actual.get(name) == section, f"{name} -> {section[1]}"))
+
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print("✅ 章节分配测试通过")
+        return True
+    else:
+        print("❌ 章节分配测试失败")
+        print("实际结果:")
+        print(actual)
+        return False
+
+
+def test_parallel_subplan_loading():
+    """测试子规划较多时并行加载与串行加载的整合结果一致"""
+    print("🧪 测试并行加载子规划...")
+
+    subplan_files = sorted(p for p in EXAMPLES_DIR.glob('*.md') if p != MASTER_FILE)
+    file_count = _PARALLEL_LOAD_MIN_FILES + 4
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        subplans_dir = Path(work_dir) / 'subplans'
+        subplans_dir.mkdir()
+        # 复制示例子规划，使文件数超过并行加载的阈值
+        for index in range(file_count):
+            source = subplan_files[index % len(subplan_files)]
+            shutil.copy(source, subplans_dir / f'{index:02d}_{source.name}')
+
+        results = {}
+        for max_workers in (1, 2):
+            output_file = Path(work_dir) / f'merged_{max_workers}.md'
+            report = PlanMerger().merge_plans(str(MASTER_FILE), str(subplans_dir), str(output_file),
+                                              max_workers=max_workers)
+            results[max_workers] = (report['matching_details'], output_file.read_text(encoding='utf-8'))
+
+    sequential, parallel = results[1], results[2]
+    checks = [
+        (len(sequential[0]) == file_count, f"{file_count} 个子规划均已匹配"),
+        (parallel[0] == sequential[0], "并行加载的匹配结果与串行一致"),
+        (parallel[1] == sequential[1], "并行加载的整合文档与串行一致"),
+    ]
+
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print("✅ 并行加载测试通过")
+        return True
+    else:
+        print("❌ 并行加载测试失败")
+        print("实际结果:")
+        print(parallel[0])
+        return False
+
+
+def test_unknown_text_backend():
+    """测试不支持的文本相似度后端"""
+    print("🧪 测试文本相似度后端校验...")
+
+    try:
+        PlanMerger(text_backend='unknown')
+    except ValueError:
+        print("  ✅ 不支持的后端抛出 ValueError")
+        print("✅ 后端校验测试通过")
+        return True
+
+    print("  ❌ 不支持的后端未报错")
+    print("❌ 后端校验测试失败")
+    return False
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("🚀 开始运行工作规划整合工具测试套件\n")
+
+    tests = [
+        test_example_section_assignment,
+        test_parallel_subplan_loading,
+        test_unknown_text_backend,
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+            print()  # 空行分隔
+        except Exception as e:
+            print(f"❌ 测试异常: {e}\n")
+
+    print("=" * 60)
+    print(f"📊 测试结果: {passed}/{total} 通过")
+
+    if passed == total:
+        print("🎉 所有测试通过！")
+    else:
+        print("⚠️  部分测试失败，请检查相关功能。")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+技能打包脚本测试
+测试 SKILL.md frontmatter 的解析与校验
+"""
+
+import tempfile
+import sys
+from pathlib import Path
+from typing import Tuple
+
+# 添加技能脚本目录到Python路径（测试放在技能目录之外，不会被打包）
+sys.path.insert(0, str(Path(__file__).parent / 'markdown_formatter' / 'scripts'))
+
+from package_skill import SkillPackageValidator
+
+
+def _validate(skill_md: str) -> Tuple[bool, SkillPackageValidator]:
+    """在临时技能目录中写入 SKILL.md 并校验元数据"""
+    with tempfile.TemporaryDirectory() as skill_dir:
+        (Path(skill_dir) / "SKILL.md").write_text(skill_md, encoding='utf-8')
+        validator = SkillPackageValidator(skill_dir)
+        passed = validator.validate_skill_metadata()
+    return passed, validator
+
+
+def test_valid_frontmatter():
+    """测试正常的 frontmatter"""
+    print("🧪 测试正常 frontmatter...")
+
+    passed, validator = _validate("""---
+name: demo-skill
+description: 用于演示 frontmatter 解析的示例技能，描述足够长
+---
+
+# 示例技能
+
+---
+
+正文中的分隔线不影响 frontmatter
+""")
+
+    checks = [
+        (passed, "校验通过"),
+        (not validator.errors, "没有错误"),
+        (validator.metadata == {
+            'name': 'demo-skill',
+            'description': '用于演示 frontmatter 解析的示例技能，描述足够长'
+        }, "元数据只取 frontmatter 内容"),
+    ]
+
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print("✅ 正常 frontmatter 测试通过")
+        return True
+    else:
+        print("❌ 正常 frontmatter 测试失败")
+        print("实际结果:")
+        print(validator.metadata, validator.errors)
+        return False
+
+
+def test_empty_frontmatter():
+    """测试空 frontmatter 不会从正文中读取元数据"""
+    print("🧪 测试空 frontmatter...")
+
+    passed, validator = _validate("""---
+---
+name: evil-name
+description: 正文中的内容不应被当作元数据解析
+
+---
+
+# 正文
+""")
+
+    checks = [
+        (not passed, "校验不通过"),
+        (bool(validator.errors), "报告错误"),
+        (validator.metadata is None, "没有从正文读取元数据"),
+    ]
+
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print("✅ 空 frontmatter 测试通过")
+        return True
+    else:
+        print("❌ 空 frontmatter 测试失败")
+        print("实际结果:")
+        print(validator.metadata, validator.errors)
+        return False
+
+
+def run_all_tests():
+    """运行所有测试"""
+    print("🚀 开始运行技能打包脚本测试套件\n")
+
+    tests = [
+        test_valid_frontmatter,
+        test_empty_frontmatter,
+    ]
+
+    passed = 0
+    total = len(tests)
+
+    for test_func in tests:
+        try:
+            if test_func():
+                passed += 1
+            print()  # 空行分隔
+        except Exception as e:
+            print(f"❌ 测试异常: {e}\n")
+
+    print("=" * 60)
+    print(f"📊 测试结果: {passed}/{total} 通过")
+
+    if passed == total:
+        print("🎉 所有测试通过！")
+    else:
+        print("⚠️  部分测试失败，请检查相关功能。")
+
+    return passed == total
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
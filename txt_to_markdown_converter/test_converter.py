@@ -234,6 +234,80 @@ def test_keyword_highlighting():
         return False
 
 
+def test_conversion_rules():
+    """测试代码块、中文序号、分组标题关键词和关键词标记的转换规则"""
+    print("🧪 测试转换规则...")
+
+    config = """formatting_rules:
+  headings:
+    keywords:
+      chinese: [概述]
+      english: [overview]
+  code_blocks:
+    detect_fences: ["```", "~~~"]
+  keywords:
+    highlight_tech_terms: true
+    tech_keywords:
+      programming: [API, Python]
+  emphasis:
+    auto_emphasize: true
+    important_words:
+      english: [note]
+"""
+
+    test_content = """### 安装步骤
+调用 API 接口完成安装
+
+水果清单：
+一、苹果、香蕉
+文档见 https://example.com/API/v1 和 API 说明
+Note: 已有的 `API` 和 **API** 保持不变
+项目概述
+chinese 版本说明"""
+
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False, encoding='utf-8') as f:
+        f.write(config)
+        config_file = f.name
+
+    try:
+        converter = TXTToMarkdownConverter(config_file)
+        result = converter.convert_content(test_content)
+    finally:
+        os.unlink(config_file)
+
+    # 随技能发布的配置同样不能把 ### 当作代码块标记
+    shipped_config = (Path(__file__).parent / "config.yaml").read_text(encoding='utf-8')
+
+    checks = [
+        ('- "###"' not in shipped_config, "默认配置不把 ### 当作代码块标记"),
+        ("调用 `API` 接口完成安装" in result, "### 标题之后的文本不被当作代码块"),
+        ("1.苹果、香蕉" in result, "只规范中文序号后的标点"),
+        ("[https://example.com/API/v1](https://example.com/API/v1)" in result, "链接中的关键词不加反引号"),
+        ("和 `API` 说明" in result, "链接之外的关键词正常高亮"),
+        ("**Note**:" in result, "强调词不区分大小写并保留原文大小写"),
+        ("已有的 `API` 和 **API** 保持不变" in result, "已有的行内代码和加粗文本不重复标记"),
+        ("\n# 项目概述" in result, "按语言分组的标题关键词提升为标题"),
+        ("\nchinese 版本说明" in result, "分组名称不作为标题关键词")
+    ]
+
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print("✅ 转换规则测试通过")
+        return True
+    else:
+        print("❌ 转换规则测试失败")
+        print("实际结果:")
+        print(result)
+        return False
+
+
 def test_code_protection():
     """测试代码块保护功能"""
     print("🧪 测试代码块保护...")
@@ -354,6 +428,107 @@ def test_file_operations():
             os.unlink(result_path)
 
 
+def test_batch_conversion():
+    """测试批量转换与逐行转换接口"""
+    print("🧪 测试批量转换...")
+
+    contents = [
+        "概述\n这是第一个文件\n- 列表项",
+        "访问 https://example.com 获取更多信息\n使用 API 接口",
+        "一、第一项\n二、第二项\n\n\n结论",
+        "",
+    ]
+
+    converter = TXTToMarkdownConverter()
+    expected = [converter.convert_content(content) for content in contents]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_paths = []
+        for index, content in enumerate(contents):
+            input_path = Path(work_dir) / f"batch{index}.txt"
+            input_path.write_text(content, encoding='utf-8')
+            input_paths.append(str(input_path))
+
+        output_paths = converter.convert_files(input_paths, max_workers=2)
+        outputs = [Path(path).read_text(encoding='utf-8') for path in output_paths]
+
+    iter_results = ['\n'.join(converter.iter_convert(content.split('\n'))) for content in contents]
+
+    checks = [
+        (output_paths == [converter._generate_output_path(path) for path in input_paths],
+         "输出路径与输入顺序一致"),
+        (outputs == expected, "批量转换结果与 convert_content 一致"),
+        (iter_results == expected, "iter_convert 逐行结果与 convert_content 一致")
+    ]
+
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print("✅ 批量转换测试通过")
+        return True
+    else:
+        print("❌ 批量转换测试失败")
+        print("实际结果:")
+        print(outputs)
+        return False
+
+
+def test_failed_conversion_keeps_output():
+    """测试所有编码都无法解码时不破坏已有输出"""
+    print("🧪 测试转换失败时的输出文件...")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_file = Path(work_dir) / "input.txt"
+        # 开头可以正常解码，后部的字节对所有配置的编码都无效
+        input_file.write_bytes(b"valid line\n" * 1000 + b"\x81\xff\xfe\x80\n")
+
+        converter = TXTToMarkdownConverter()
+        results = {}
+        for existing in (True, False):
+            output_file = Path(work_dir) / ("prev.md" if existing else "new.md")
+            if existing:
+                output_file.write_text("keep me\n", encoding='utf-8')
+            try:
+                converter.convert_file(str(input_file), str(output_file))
+                raised = False
+            except ValueError:
+                raised = True
+            content = output_file.read_text(encoding='utf-8') if output_file.exists() else None
+            results[existing] = (raised, content)
+
+        remaining = sorted(os.listdir(work_dir))
+
+    checks = [
+        (results[True][0] and results[False][0], "解码失败向调用方抛出"),
+        (results[True][1] == "keep me\n", "已有输出文件内容不变"),
+        (results[False][1] is None, "不生成空的输出文件"),
+        (remaining == ["input.txt", "prev.md"], "不残留临时文件")
+    ]
+
+    all_passed = True
+    for check, description in checks:
+        if check:
+            print(f"  ✅ {description}")
+        else:
+            print(f"  ❌ {description}")
+            all_passed = False
+
+    if all_passed:
+        print("✅ 转换失败保护测试通过")
+        return True
+    else:
+        print("❌ 转换失败保护测试失败")
+        print("实际结果:")
+        print(results, remaining)
+        return False
+
+
 def test_complex_document():
     """测试复杂文档的综合格式化"""
     print("🧪 测试复杂文档综合格式化...")
@@ -443,8 +618,11 @@ def run_all_tests():
         test_table_formatting,
         test_link_formatting,
         test_keyword_highlighting,
+        test_conversion_rules,
         test_code_protection,
         test_file_operations,
+        test_batch_conversion,
+        test_failed_conversion_keeps_output,
         test_complex_document,
     ]
 
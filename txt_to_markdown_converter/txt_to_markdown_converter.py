@@ -9,13 +9,81 @@ Description: 读取TXT文件，智能分析内容结构，自动添加Markdown
              保持原文内容不变，仅添加格式化来提升可读性和结构清晰度。
 """
 
+import contextlib
+import os
 import re
+import secrets
+import shutil
 import sys
 import argparse
 import yaml
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, TextIO
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 行首分类（作用于去除首尾空白后的行），按 lastgroup 分派：
+#   formatted: 已有Markdown格式的标题、列表、引用、表格、代码块
+#   marked:    已有规范标记、无需改动的列表（• 列表和 "1)" 形式的有序列表）
+#   list:      待规范化的列表，包括缺少空格的符号列表和中文数字列表
+#   quote:     以引号开头的引用
+_LINE_KIND_RE = re.compile(
+    r'(?P<formatted>#{1,6}\s|[-*+]\s|\d+\.\s|[>|]|```|~~~|###)'
+    r'|(?P<marked>•\s|\d+\)\s)'
+    r'|(?P<list>[-*+•].|[一二三四五六七八九十百千万][、.)])'
+    r'|(?P<quote>")'
+)
+# 需要交给 _LINE_KIND_RE 判断的行首字符（数字另行判断）
+_KIND_REGEX_START_CHARS = frozenset('#-*+•一二三四五六七八九十百千万')
+# 标题不会以这些标点结尾
+_TITLE_END_PUNCT = ('。', '，', '；', '：', '、', '）', ')', '】', ']', '.', ',', ';', ':')
+_LIST_PUNCT_RE = re.compile(r'[、\.\)]+')
+_MULTI_SPACE_RE = re.compile(r'\s{2,}')
+_URL_RE = re.compile(r'(https?://[^\s\)]+)')
+_WWW_RE = re.compile(r'(^|\s)(www\.[^\s]+)')
+
+
+def _classify_line(line: str) -> Optional[str]:
+    """按首字符分派行首分类，字面前缀直接判断，其余才匹配 _LINE_KIND_RE"""
+    first = line[0]
+    if first in _KIND_REGEX_START_CHARS or first.isdecimal():
+        match = _LINE_KIND_RE.match(line)
+        return match.lastgroup if match else None
+    if first == '>' or first == '|':
+        return 'formatted'
+    if first == '"':
+        return 'quote'
+    if line.startswith(('```', '~~~')):
+        return 'formatted'
+    return None
+
+
+@contextlib.contextmanager
+def _atomic_output(output_path: str) -> Iterator[TextIO]:
+    """写入同目录下的临时文件，成功后再替换目标文件；出错时删除临时文件，已有的输出保持不变"""
+    target = Path(output_path)
+    tmp_path = target.with_name(f'.{target.name}.{secrets.token_hex(4)}.tmp')
+    try:
+        with open(tmp_path, 'x', encoding='utf-8') as f:
+            yield f
+        # 覆盖已有文件时保留其权限
+        if target.exists():
+            shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+
+def _iter_lines(stream: TextIO) -> Iterator[str]:
+    """逐行读取文本流，切分结果与 str.split('\\n') 一致"""
+    line = ''
+    for line in stream:
+        yield line[:-1] if line.endswith('\n') else line
+    if not line or line.endswith('\n'):
+        yield ''
 
 
 class TXTToMarkdownConverter:
@@ -29,10 +97,59 @@ class TXTToMarkdownConverter:
             config_path: 配置文件路径，如果为None则使用默认配置
         """
         self.config = self._load_config(config_path)
-        self.lines = []
-        self.formatted_lines = []
+        self._cache_settings()
+        self._keyword_pattern = self._build_keyword_pattern()
         self._setup_logging()
 
+    def _cache_settings(self) -> None:
+        """将逐行处理时用到的配置项展开为实例属性，避免每行重复查找字典"""
+        rules = self.config.get('formatting_rules', {})
+
+        heading_config = rules.get('headings', {})
+        self._heading_auto_detect = heading_config.get('auto_detect', True)
+        self._heading_min_length = heading_config.get('min_length', 2)
+        self._heading_max_length = heading_config.get('max_length', 50)
+        self._heading_max_level = heading_config.get('max_level', 6)
+        heading_words = self._join_words(self._flatten_words(heading_config.get('keywords', [])))
+        self._heading_keyword_re = re.compile(heading_words) if heading_words else None
+
+        list_config = rules.get('lists', {})
+        self._list_auto_detect = list_config.get('auto_detect', True)
+        self._convert_chinese_numbers = list_config.get('convert_chinese_numbers', True)
+        self._chinese_number_map = list_config.get('chinese_number_map', {
+            '一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
+            '六': '6', '七': '7', '八': '8', '九': '9', '十': '10'
+        })
+
+        table_config = rules.get('tables', {})
+        self._table_auto_detect = table_config.get('auto_detect', True)
+        self._table_min_columns = table_config.get('min_columns', 2)
+        self._table_separator = table_config.get('separator', ' | ')
+
+        self._format_urls = rules.get('links', {}).get('auto_format_urls', True)
+
+        code_config = rules.get('code_blocks', {})
+        self._code_fences = tuple(code_config.get('detect_fences', ['```', '~~~']))
+
+        self._encodings = self.config.get('file_handling', {}).get('encoding', ['utf-8'])
+
+        keywords_config = rules.get('keywords', {})
+        self._tech_keywords = ()
+        if keywords_config.get('highlight_tech_terms', True):
+            self._tech_keywords = self._flatten_words(keywords_config.get('tech_keywords', {}))
+
+        emphasis_config = rules.get('emphasis', {})
+        self._important_words = ()
+        if emphasis_config.get('auto_emphasize', True):
+            self._important_words = self._flatten_words(emphasis_config.get('important_words', {}))
+
+    @staticmethod
+    def _flatten_words(words: Any) -> Tuple[str, ...]:
+        """展开词汇配置，支持列表或按类别分组的字典"""
+        if isinstance(words, dict):
+            return tuple(word for group in words.values() if isinstance(group, list) for word in group)
+        return tuple(words)
+
     def _setup_logging(self):
         """设置日志"""
         logging.basicConfig(
@@ -91,13 +208,16 @@ class TXTToMarkdownConverter:
             输出文件路径
         """
         try:
-            content = self._read_file(input_path)
-            formatted_content = self.convert_content(content)
-
             if output_path is None:
                 output_path = self._generate_output_path(input_path)
 
-            self._write_file(output_path, formatted_content)
+            if Path(output_path).resolve() == Path(input_path).resolve():
+                # 原地转换时需先完整读入，避免覆盖尚未读取的内容
+                content = self._read_file(input_path)
+                self._write_file(output_path, self.convert_content(content))
+            else:
+                self._convert_stream(input_path, output_path)
+
             self.logger.info(f"转换完成: {input_path} -> {output_path}")
 
             return output_path
@@ -106,6 +226,22 @@ class TXTToMarkdownConverter:
             self.logger.error(f"转换文件失败: {e}")
             raise
 
+    def convert_files(self, input_paths: Iterable[str], max_workers: Optional[int] = None) -> List[str]:
+        """
+        并发批量转换多个文件，输出路径按默认规则生成
+
+        Args:
+            input_paths: 输入文件路径
+            max_workers: 最大线程数，None时使用ThreadPoolExecutor的默认值
+
+        Returns:
+            与输入顺序一致的输出文件路径列表
+        """
+        # 转换过程只读取实例配置，可在线程间共享同一实例；
+        # 小文件批量转换的耗时主要在文件读写，线程可以相互重叠
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.convert_file, input_paths))
+
     def convert_content(self, content: str) -> str:
         """
         转换文本内容为Markdown格式
@@ -116,34 +252,85 @@ class TXTToMarkdownConverter:
         Returns:
             格式化后的Markdown内容
         """
-        self.lines = content.split('\n')
-        self.formatted_lines = []
+        return '\n'.join(self.iter_convert(content.split('\n')))
+
+    def iter_convert(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        逐行转换文本，只保留上一行是否为空和代码块状态，适合流式处理大文件
+
+        Args:
+            lines: 不含换行符的原始行
+
+        Yields:
+            格式化后的行
+        """
+        # 热循环内用到的属性和方法绑定为局部变量
+        fences = self._code_fences
+        process_line = self._process_line
+        fence = None
+        prev_blank = True
+        for line in lines:
+            # 每行只 strip 一次，代码块检测、空行判断和格式化共用结果
+            stripped = line.strip()
+
+            # 代码块起止标记行也视为代码块的一部分
+            if fence is None:
+                if stripped.startswith(fences):
+                    fence = next(f for f in fences if stripped.startswith(f))
+                in_code = fence is not None
+            else:
+                in_code = True
+                if stripped.startswith(fence):
+                    fence = None
 
-        i = 0
-        while i < len(self.lines):
-            line = self.lines[i]
-            formatted_line = self._process_line(line, i)
-            self.formatted_lines.append(formatted_line)
-            i += 1
+            yield process_line(line, stripped, prev_blank, in_code)
+            prev_blank = not stripped
 
-        return '\n'.join(self.formatted_lines)
+    def _convert_stream(self, input_path: str, output_path: str) -> None:
+        """
+        边读边写地转换文件，按配置的编码依次尝试
+
+        先写入临时文件，某个编码完整解码成功后才替换输出文件；
+        所有编码都失败时不会留下空的或写了一半的输出文件
+        """
+        encodings = self._encodings
+
+        for encoding in encodings:
+            try:
+                with open(input_path, 'r', encoding=encoding) as src, \
+                        _atomic_output(output_path) as dst:
+                    formatted = self.iter_convert(_iter_lines(src))
+                    dst.write(next(formatted))
+                    for line in formatted:
+                        dst.write('\n')
+                        dst.write(line)
+                return
+            except UnicodeDecodeError:
+                continue
+
+        raise ValueError(f"无法使用指定编码读取文件: {encodings}")
 
     def _read_file(self, file_path: str) -> str:
         """读取文件内容"""
-        encodings = self.config.get('file_handling', {}).get('encoding', ['utf-8'])
+        encodings = self._encodings
+
+        # 只读一次磁盘，再在内存中依次尝试解码
+        with open(file_path, 'rb') as f:
+            data = f.read()
 
         for encoding in encodings:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
+                text = data.decode(encoding)
             except UnicodeDecodeError:
                 continue
+            # 与文本模式读取一致，统一换行符
+            return text.replace('\r\n', '\n').replace('\r', '\n')
 
         raise ValueError(f"无法使用指定编码读取文件: {encodings}")
 
     def _write_file(self, file_path: str, content: str) -> None:
         """写入文件内容"""
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with _atomic_output(file_path) as f:
             f.write(content)
 
     def _generate_output_path(self, input_path: str) -> str:
@@ -156,141 +343,91 @@ class TXTToMarkdownConverter:
 
         return str(input_file.parent / f"{input_file.stem}{suffix}{extension}")
 
-    def _process_line(self, line: str, index: int) -> str:
+    def _process_line(self, line: str, stripped: str, prev_blank: bool, in_code: bool) -> str:
         """
         处理单行文本
 
         Args:
             line: 原始行文本
-            index: 行索引
+            stripped: 去除首尾空白后的行文本
+            prev_blank: 上一行是否为空行，首行视为True
+            in_code: 当前行是否位于代码块内
 
         Returns:
             处理后的行文本
         """
-        original_line = line.rstrip()
-        stripped = original_line.strip()
-
         # 空行保持不变
         if not stripped:
             return ''
 
-        # 已经是Markdown格式的，保持不变
-        if self._is_already_formatted(stripped):
-            return original_line
+        kind = _classify_line(stripped)
 
-        # 代码块检测和保护
-        if self._is_in_code_block(index):
-            return original_line
+        # 已经是Markdown格式的或位于代码块内，只去掉行尾空白
+        if kind == 'formatted' or in_code:
+            return line.rstrip()
 
         # 智能标题检测
-        if self._is_title_line(stripped, index):
+        if self._is_title_line(stripped, prev_blank):
             return self._format_as_title(stripped)
 
-        # 列表检测和格式化
-        if self._is_list_line(stripped):
+        # 列表检测和格式化，已有正确格式的保持不变
+        if kind == 'marked' and self._list_auto_detect:
+            return stripped
+        if kind == 'list' and self._list_auto_detect:
             return self._format_as_list(stripped)
 
         # 表格检测和格式化
-        if self._is_table_line(stripped):
-            return self._format_as_table(stripped)
+        table_line = self._format_table_line(stripped)
+        if table_line is not None:
+            return table_line
 
         # 引用检测
-        if self._is_quote_line(stripped):
+        if kind == 'quote':
             return self._format_as_quote(stripped)
 
         # 链接格式化
-        formatted_line = self._format_links(original_line)
+        formatted_line = self._format_links(line.rstrip())
 
-        # 关键词高亮
-        formatted_line = self._highlight_keywords(formatted_line)
-
-        # 强调文本
-        formatted_line = self._add_emphasis(formatted_line)
+        # 关键词高亮与强调文本
+        formatted_line = self._mark_keywords(formatted_line)
 
         return formatted_line
 
-    def _is_already_formatted(self, line: str) -> bool:
-        """检测是否已经是Markdown格式"""
-        patterns = [
-            r'^#{1,6}\s+',  # 标题
-            r'^\s*[-*+]\s+',  # 无序列表
-            r'^\s*\d+\.\s+',  # 有序列表
-            r'^\s*>',  # 引用
-            r'^\s*\|',  # 表格
-            r'^(```|~~~|###)',  # 代码块
-            r'^\s*[-+*]\s+',  # 列表
-        ]
-
-        return any(re.match(pattern, line) for pattern in patterns)
-
-    def _is_in_code_block(self, index: int) -> bool:
-        """检测是否在代码块内"""
-        if not (0 <= index < len(self.lines)):
-            return False
-
-        line = self.lines[index].strip()
-
-        # 检查当前行是否是代码块标记
-        if line.startswith(('```', '~~~', '###')):
-            return True
-
-        # 向前查找代码块开始标记
-        for i in range(max(0, index - 50), index):
-            prev_line = self.lines[i].strip()
-            if prev_line.startswith(('```', '~~~', '###')):
-                # 查找对应的结束标记
-                fence_char = prev_line[0] if prev_line.startswith('###') else prev_line[:3]
-                for j in range(i + 1, min(len(self.lines), i + 100)):
-                    if self.lines[j].strip().startswith(fence_char):
-                        return i < index < j
-                return True
-
-        return False
-
-    def _is_title_line(self, line: str, index: int) -> bool:
+    def _is_title_line(self, line: str, prev_empty: bool) -> bool:
         """智能检测标题行"""
-        heading_config = self.config.get('formatting_rules', {}).get('headings', {})
-
-        if not heading_config.get('auto_detect', True):
+        if not self._heading_auto_detect:
             return False
 
         # 行太长不可能是标题
-        max_length = heading_config.get('max_length', 50)
-        if len(line) > max_length:
+        if len(line) > self._heading_max_length:
             return False
 
         # 行太短不可能是标题
-        min_length = heading_config.get('min_length', 2)
-        if len(line) < min_length:
+        if len(line) < self._heading_min_length:
             return False
 
         # 以标点符号结尾不太可能是标题
-        if any(line.endswith(punct) for punct in ['。', '，', '；', '：', '、', '）', ')', '】', ']', '.', ',', ';', ':']):
+        if line.endswith(_TITLE_END_PUNCT):
             return False
 
         # 检查标题关键词
-        keywords = heading_config.get('keywords', [])
-        if any(keyword in line for keyword in keywords):
+        if self._has_heading_keyword(line):
             return True
 
-        # 检查段落边界
-        prev_empty = index == 0 or not self.lines[index-1].strip()
-        next_empty = index == len(self.lines)-1 or not self.lines[index+1].strip()
-
         # 独立成行的短文本很可能是标题
         if prev_empty and len(line) < 30:
             return True
 
         return False
 
+    def _has_heading_keyword(self, line: str) -> bool:
+        """检测行内是否包含标题关键词，所有关键词合并为一次正则扫描"""
+        return self._heading_keyword_re is not None and self._heading_keyword_re.search(line) is not None
+
     def _format_as_title(self, line: str) -> str:
         """格式化为标题"""
-        heading_config = self.config.get('formatting_rules', {}).get('headings', {})
-        max_level = heading_config.get('max_level', 6)
-
         # 检查标题关键词，提升级别
-        keywords = heading_config.get('keywords', [])
-        if any(keyword in line for keyword in keywords):
+        if self._has_heading_keyword(line):
             level = 1  # 包含关键词的直接作为一级标题
         else:
             # 根据长度确定标题级别
@@ -302,52 +439,22 @@ class TXTToMarkdownConverter:
                 level = 4  # 长文本作为四级标题
 
         # 限制最大级别
-        level = min(level, max_level)
+        level = min(level, self._heading_max_level)
 
         return f"{'#' * level} {line}"
 
-    def _is_list_line(self, line: str) -> bool:
-        """检测列表行"""
-        list_config = self.config.get('formatting_rules', {}).get('lists', {})
-
-        if not list_config.get('auto_detect', True):
-            return False
-
-        # 已有的列表标记
-        if re.match(r'^[-*+•]\s+', line) or re.match(r'^\d+[\.\)]\s+', line):
-            return True
-
-        # 中文数字列表
-        if re.match(r'^[一二三四五六七八九十百千万][、\.\)]\s*', line):
-            return True
-
-        # 以列表符号开头但格式不规范
-        if line and line[0] in '-*+•' and len(line) > 1 and line[1] != ' ':
-            return True
-
-        return False
-
     def _format_as_list(self, line: str) -> str:
         """格式化列表"""
-        list_config = self.config.get('formatting_rules', {}).get('lists', {})
         stripped = line.strip()
 
-        # 如果已经有正确的格式，保持不变
-        if re.match(r'^[-*+•]\s+', stripped) or re.match(r'^\d+[\.\)]\s+', stripped):
-            return line
-
         # 中文数字转换
-        if list_config.get('convert_chinese_numbers', True):
-            chinese_map = list_config.get('chinese_number_map', {
-                '一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
-                '六': '6', '七': '7', '八': '8', '九': '9', '十': '10'
-            })
-
-            for cn, num in chinese_map.items():
-                if stripped.startswith(cn):
-                    result = stripped.replace(cn, num, 1)
-                    result = re.sub(r'[、\.\)]+', '.', result)
-                    return f"{result} "
+        # 中文数字映射的键均为单个汉字，按首字符直接查表
+        if self._convert_chinese_numbers:
+            num = self._chinese_number_map.get(stripped[0])
+            if num is not None:
+                # 只规范紧跟序号的标点，正文中的顿号等保持不变
+                tail = _LIST_PUNCT_RE.sub('.', stripped[1:], count=1)
+                return f"{num}{tail} "
 
         # 修复不规范符号
         if stripped and stripped[0] in '-*+•' and (len(stripped) == 1 or stripped[1] != ' '):
@@ -355,45 +462,34 @@ class TXTToMarkdownConverter:
 
         return line
 
-    def _is_table_line(self, line: str) -> bool:
-        """检测表格行"""
-        table_config = self.config.get('formatting_rules', {}).get('tables', {})
+    def _format_table_line(self, line: str) -> Optional[str]:
+        """检测并格式化表格行，不是表格时返回None；多空格切分结果在检测和格式化间复用"""
+        if not self._table_auto_detect:
+            return None
 
-        if not table_config.get('auto_detect', True):
-            return False
+        has_tab = '\t' in line
 
-        # 制表符分隔
-        if '\t' in line and line.count('\t') >= table_config.get('min_columns', 2) - 1:
-            return True
+        # 制表符足够多时直接按制表符分列，否则检查多空格分隔
+        if not (has_tab and line.count('\t') >= self._table_min_columns - 1):
+            parts = _MULTI_SPACE_RE.split(line)
+            if len(parts) < self._table_min_columns:
+                return None
 
-        # 多空格分隔
-        parts = re.split(r'\s{2,}', line.strip())
-        if len(parts) >= table_config.get('min_columns', 2):
             # 检查是否都是简短文本（表格特征）
-            short_parts = [p for p in parts if len(p.strip()) < 20]
-            if len(short_parts) >= len(parts) * 0.6:
-                return True
-
-        return False
+            short_count = sum(1 for p in parts if len(p.strip()) < 20)
+            if short_count < len(parts) * 0.6:
+                return None
 
-    def _format_as_table(self, line: str) -> str:
-        """格式化表格"""
-        table_config = self.config.get('formatting_rules', {}).get('tables', {})
-        separator = table_config.get('separator', ' | ')
+            if not has_tab:
+                return self._join_table_cells(parts)
 
-        # 优先使用制表符分割
-        if '\t' in line:
-            parts = line.split('\t')
-        else:
-            parts = re.split(r'\s{2,}', line.strip())
-
-        # 清理每列内容
-        clean_parts = [part.strip() for part in parts if part.strip()]
-        return separator.join(clean_parts)
+        # 含制表符时优先使用制表符分割
+        return self._join_table_cells(line.split('\t'))
 
-    def _is_quote_line(self, line: str) -> bool:
-        """检测引用行"""
-        return line.startswith('>') or line.startswith('"') or line.startswith('"')
+    def _join_table_cells(self, parts: List[str]) -> str:
+        """清理每列内容并用分隔符连接"""
+        cells = [cell for cell in (part.strip() for part in parts) if cell]
+        return self._table_separator.join(cells)
 
     def _format_as_quote(self, line: str) -> str:
         """格式化引用"""
@@ -410,72 +506,60 @@ class TXTToMarkdownConverter:
 
     def _format_links(self, line: str) -> str:
         """格式化链接"""
-        links_config = self.config.get('formatting_rules', {}).get('links', {})
+        if not self._format_urls:
+            return line
 
-        if not links_config.get('auto_format_urls', True):
+        # 不含链接特征的行无需正则替换
+        if 'http' not in line and 'www.' not in line:
             return line
 
         # HTTP/HTTPS 链接
-        line = re.sub(
-            r'(https?://[^\s\)]+)',
-            r'[\1](\1)',
-            line
-        )
+        line = _URL_RE.sub(r'[\1](\1)', line)
 
         # WWW 链接
-        line = re.sub(
-            r'(^|\s)(www\.[^\s]+)',
-            r'\1[\2](https://\2)',
-            line
-        )
-
-        return line
-
-    def _highlight_keywords(self, line: str) -> str:
-        """高亮技术关键词"""
-        keywords_config = self.config.get('formatting_rules', {}).get('keywords', {})
-
-        if not keywords_config.get('highlight_tech_terms', True):
-            return line
-
-        tech_keywords = keywords_config.get('tech_keywords', {})
-        all_keywords = []
-
-        # 收集所有技术关键词
-        for category, keywords in tech_keywords.items():
-            if isinstance(keywords, list):
-                all_keywords.extend(keywords)
-
-        for keyword in all_keywords:
-            if keyword in line and f'`{keyword}`' not in line:
-                # 使用单词边界避免部分匹配
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                line = re.sub(pattern, f'`{keyword}`', line)
+        line = _WWW_RE.sub(r'\1[\2](https://\2)', line)
 
         return line
 
-    def _add_emphasis(self, line: str) -> str:
-        """添加强调"""
-        emphasis_config = self.config.get('formatting_rules', {}).get('emphasis', {})
+    def _build_keyword_pattern(self) -> Optional[re.Pattern]:
+        """
+        构建技术关键词与强调词汇的组合正则，整行只需扫描一次
 
-        if not emphasis_config.get('auto_emphasize', True):
+        已有的行内代码、加粗文本和Markdown链接整体匹配为 skip 分组，保持原样
+        """
+        alternatives = []
+        if self._tech_keywords:
+            alternatives.append(rf'(?P<code>\b(?:{self._join_words(self._tech_keywords)})\b)')
+        if self._important_words:
+            alternatives.append(rf'(?P<em>(?i:\b(?:{self._join_words(self._important_words)})\b))')
+
+        if not alternatives:
+            return None
+
+        skip = r'(?P<skip>`[^`]*`|\*\*[^*]+\*\*|\[[^\]]*\]\([^)]*\))'
+        return re.compile('|'.join([skip] + alternatives))
+
+    @staticmethod
+    def _join_words(words: Iterable[str]) -> str:
+        """转义并按长度降序拼接词汇，保证较长的词优先匹配"""
+        unique = sorted({str(word) for word in words if word}, key=len, reverse=True)
+        return '|'.join(re.escape(word) for word in unique)
+
+    @staticmethod
+    def _wrap_keyword(match: re.Match) -> str:
+        """为匹配到的关键词添加行内代码或加粗标记"""
+        kind = match.lastgroup
+        if kind == 'code':
+            return f'`{match.group()}`'
+        if kind == 'em':
+            return f'**{match.group()}**'
+        return match.group()
+
+    def _mark_keywords(self, line: str) -> str:
+        """高亮技术关键词并强调重要词汇"""
+        if self._keyword_pattern is None:
             return line
-
-        important_words = emphasis_config.get('important_words', {})
-        all_important = []
-
-        # 收集所有重要词汇
-        for category, words in important_words.items():
-            if isinstance(words, list):
-                all_important.extend(words)
-
-        for word in all_important:
-            if word in line and f'**{word}**' not in line:
-                # 使用单词边界
-                pattern = r'\b' + re.escape(word) + r'\b'
-                line = re.sub(pattern, f'**{word}**', line, flags=re.IGNORECASE)
-
-        return line
+        return self._keyword_pattern.sub(self._wrap_keyword, line)
 
 
 def main():
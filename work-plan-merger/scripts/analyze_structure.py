@@ -6,15 +6,23 @@
 """
 
 import argparse
+import io
 import re
 import json
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 
+# 关键词提取时忽略的常用词
+_COMMON_WORDS = frozenset({'的', '和', '在', '是', '为', '了', '与', '中', '有', '及', '等', '或', '将', '会', '对', '进行'})
+_WORD_RE = re.compile(r'[\u4e00-\u9fff]+|[a-zA-Z]+')
+_SEPARATOR_LINE = "=" * 50 + "\n"
+
+
 class PlanAnalyzer:
     def __init__(self):
-        self.heading_pattern = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
+        # 标题与内容之间的空白不跨行，保证整篇扫描与逐行匹配结果一致
+        self.heading_pattern = re.compile(r'^(#{1,6})[^\S\n]+(.+)$', re.MULTILINE)
 
     def analyze_structure(self, file_path: str) -> Dict:
         """分析markdown文件的结构"""
@@ -42,33 +50,39 @@ class PlanAnalyzer:
     def _extract_headings(self, content: str) -> List[Dict]:
         """提取所有标题及其位置"""
         headings = []
-        lines = content.split('\n')
-
-        for i, line in enumerate(lines):
-            match = self.heading_pattern.match(line)
-            if match:
-                level = len(match.group(1))
-                title = match.group(2).strip()
-                headings.append({
-                    'level': level,
-                    'title': title,
-                    'line_number': i + 1,
-                    'content_preview': self._get_content_preview(content, i)
-                })
+        line_number = 1
+        pos = 0
+
+        # 整篇一次扫描，行号按两次匹配之间的换行数累加
+        for match in self.heading_pattern.finditer(content):
+            line_number += content.count('\n', pos, match.start())
+            pos = match.start()
+            level = len(match.group(1))
+            title = match.group(2).strip()
+            headings.append({
+                'level': level,
+                'title': title,
+                'line_number': line_number,
+                'content_preview': self._get_content_preview(content, match.end())
+            })
 
         return headings
 
-    def _get_content_preview(self, content: str, heading_line: int) -> str:
-        """获取标题后的内容预览"""
-        lines = content.split('\n')
-        start = heading_line
-        end = min(start + 5, len(lines))
-
+    def _get_content_preview(self, content: str, heading_end: int) -> str:
+        """获取标题后的内容预览，直接按偏移切片，不再整篇拆分"""
         preview_lines = []
-        for i in range(start + 1, end):
-            if lines[i].startswith('#'):
+        pos = heading_end
+        for _ in range(4):
+            if pos >= len(content):
+                break
+            next_pos = content.find('\n', pos + 1)
+            if next_pos == -1:
+                next_pos = len(content)
+            line = content[pos + 1:next_pos]
+            if line.startswith('#'):
                 break
-            preview_lines.append(lines[i])
+            preview_lines.append(line)
+            pos = next_pos
 
         preview = ' '.join(preview_lines).strip()
         return preview[:100] + '...' if len(preview) > 100 else preview
@@ -93,11 +107,16 @@ class PlanAnalyzer:
 
     def _extract_keywords(self, text: str) -> List[str]:
         """提取关键词"""
-        # 简单的关键词提取逻辑
-        common_words = {'的', '和', '在', '是', '为', '了', '与', '中', '有', '及', '等', '或', '将', '会', '对', '进行'}
-        words = re.findall(r'[\u4e00-\u9fff]+|[a-zA-Z]+', text.lower())
-        keywords = [word for word in words if len(word) > 1 and word not in common_words]
-        return list(set(keywords))[:10]  # 返回前10个独特关键词
+        # 简单的关键词提取逻辑，按出现顺序收集，凑满10个即停止
+        seen = set()
+        keywords = []
+        for word in _WORD_RE.findall(text.lower()):
+            if len(word) > 1 and word not in _COMMON_WORDS and word not in seen:
+                seen.add(word)
+                keywords.append(word)
+                if len(keywords) == 10:
+                    break
+        return keywords
 
     def _count_levels(self, headings: List[Dict]) -> Dict[int, int]:
         """统计各级标题数量"""
@@ -134,44 +153,44 @@ def main():
 
 def format_structure_as_text(structure: Dict) -> str:
     """将结构分析结果格式化为文本"""
-    output = []
-    output.append("=" * 50)
-    output.append(f"文档结构分析: {structure['file_path']}")
-    output.append("=" * 50)
-    output.append("")
+    buf = io.StringIO()
+    w = buf.write
+
+    w(_SEPARATOR_LINE)
+    w(f"文档结构分析: {structure['file_path']}\n")
+    w(_SEPARATOR_LINE)
+    w("\n")
 
     # 基本信息
-    output.append("📊 基本信息:")
-    output.append(f"  总标题数: {structure['total_headings']}")
-    output.append(f"  主要章节数: {len(structure['main_sections'])}")
-    output.append("")
+    w("📊 基本信息:\n")
+    w(f"  总标题数: {structure['total_headings']}\n")
+    w(f"  主要章节数: {len(structure['main_sections'])}\n")
+    w("\n")
 
     # 标题层级分布
-    output.append("📈 标题层级分布:")
+    w("📈 标题层级分布:\n")
     for level, count in sorted(structure['heading_levels'].items()):
-        prefix = "#" * level
-        output.append(f"  {prefix} 级标题: {count} 个")
-    output.append("")
+        w(f"  {'#' * level} 级标题: {count} 个\n")
+    w("\n")
 
     # 主要章节
-    output.append("📋 主要章节:")
+    w("📋 主要章节:\n")
     for section in structure['main_sections']:
-        prefix = "#" * section['level']
         preview = section['content_preview'][:50]
-        output.append(f"  {prefix} {section['title']}")
+        w(f"  {'#' * section['level']} {section['title']}\n")
         if preview:
-            output.append(f"    预览: {preview}...")
-    output.append("")
+            w(f"    预览: {preview}...\n")
+    w("\n")
 
     # 主题分析
-    output.append("🏷️ 主题分析:")
+    w("🏷️ 主题分析:\n")
     for theme in structure['themes']:
-        prefix = "#" * theme['level']
         keywords = ", ".join(theme['keywords'][:5])
-        output.append(f"  {prefix} {theme['title']}")
-        output.append(f"    关键词: {keywords}")
+        w(f"  {'#' * theme['level']} {theme['title']}\n")
+        w(f"    关键词: {keywords}\n")
 
-    return "\n".join(output)
+    # 去掉最后一行的换行符，与逐行拼接的结果保持一致
+    return buf.getvalue()[:-1]
 
 
 if __name__ == "__main__":
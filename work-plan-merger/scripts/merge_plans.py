@@ -7,54 +7,172 @@
 
 import argparse
 import re
+import sys
 import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, TextIO, Tuple, Optional
 from difflib import SequenceMatcher
-import jieba
+
+try:
+    import jieba_fast as jieba
+except ImportError:  # 未安装 jieba_fast 时使用纯 Python 实现的 jieba，分词结果相同
+    import jieba
+
+try:
+    from rapidfuzz import fuzz
+except ImportError:  # rapidfuzz 为可选依赖，仅在显式选择 rapidfuzz 后端时需要
+    fuzz = None
+
+
+# 关键词提取时过滤的停用词
+_STOP_WORDS = frozenset({'的', '和', '在', '是', '为', '了', '与', '中', '有', '及', '等', '或', '将', '会', '对', '进行', '工作', '规划', '计划'})
+
+# 子规划文件数达到该值时才启用进程池并行加载
+_PARALLEL_LOAD_MIN_FILES = 16
+
+# 各文本相似度后端的默认最小相似度阈值
+# rapidfuzz 的 Indel 比率普遍高于 difflib 的匹配块比率，阈值需相应提高
+_DEFAULT_MIN_SIMILARITY = {
+    'difflib': 0.1,
+    'rapidfuzz': 0.2,
+}
+
+
+def _text_scorer(reference: str, backend: str = 'difflib') -> Callable[[str, float], float]:
+    """
+    返回计算文本与 reference 相似度（0-1）的函数
+
+    backend 为 'difflib'（默认）时使用 SequenceMatcher 的匹配块比率，复用同一个
+    SequenceMatcher，对 reference 建立的索引只计算一次；为 'rapidfuzz' 时使用
+    rapidfuzz 的 Indel 比率，速度更快但分值不同，匹配结果可能改变。
+    传入 cutoff 时，能确定相似度低于 cutoff 的文本直接返回 0，不再计算精确值
+    """
+    if backend == 'rapidfuzz':
+        def ratio(text: str, cutoff: float) -> float:
+            return fuzz.ratio(text, reference, score_cutoff=cutoff * 100) / 100.0
+    else:
+        matcher = SequenceMatcher(None, '', reference)
+
+        def ratio(text: str, cutoff: float) -> float:
+            matcher.set_seq1(text)
+            # real_quick_ratio / quick_ratio 是 ratio 的上界，代价分别为 O(1) 和 O(n)
+            if cutoff > 0 and (matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff):
+                return 0.0
+            return matcher.ratio()
+
+    def score(text: str, cutoff: float = 0.0) -> float:
+        # 相同文本或空文本的结果是确定的，无需调用匹配器
+        if text == reference:
+            return 1.0
+        if not text:
+            return 0.0
+        return ratio(text, cutoff)
+
+    return score
+
+
+def _keywords(text: str) -> Tuple[str, ...]:
+    """提取关键词"""
+    # 使用jieba进行中文分词
+    words = jieba.lcut(text.lower())
+
+    # 过滤停用词和短词的同时计数
+    word_freq = Counter(
+        word for word in words if len(word) > 1 and word not in _STOP_WORDS and word.strip()
+    )
+
+    # 返回前10个最常见的关键词（部分排序，频次相同时保持出现顺序）
+    # 关键词驻留后，倒排索引查找和集合运算中相同的词可直接按指针比较
+    return tuple(sys.intern(word) for word, _ in word_freq.most_common(10))
+
+
+@lru_cache(maxsize=256)
+def _cached_keywords(text: str) -> Tuple[str, ...]:
+    """
+    提取关键词（按文本缓存）
+
+    只用于"标题 + 章节开头"这类短文本：模板化文档中它们经常重复，相同文本不再重复分词。
+    整篇子规划各不相同且可能很大，不进入缓存，避免合并结束后缓存仍持有整篇文档
+    """
+    return _keywords(text)
+
+
+def _read_text(file_path) -> str:
+    """一次读入字节后整体按 UTF-8 解码，换行符与文本模式读取一致"""
+    text = Path(file_path).read_bytes().decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _write_lines(f: TextIO, lines: Iterable[str]) -> None:
+    """以换行符分隔写出各行，结果与 '\n'.join(lines) 相同（末尾不追加换行）"""
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    f.write(first)
+    f.writelines('\n' + line for line in lines)
 
 
 class PlanMerger:
-    def __init__(self):
-        self.heading_pattern = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
-        self.load_default_matching_rules()
+    __slots__ = ('matching_rules',)
+
+    # 标题与内容之间的空白不跨行，保证整篇扫描与逐行匹配结果一致
+    heading_pattern = re.compile(r'^(#{1,6})[^\S\n]+(.+)$', re.MULTILINE)
+
+    def __init__(self, text_backend: str = 'difflib'):
+        if text_backend not in _DEFAULT_MIN_SIMILARITY:
+            raise ValueError(f"不支持的文本相似度后端: {text_backend}")
+        if text_backend == 'rapidfuzz' and fuzz is None:
+            raise ImportError("使用 rapidfuzz 后端需要先安装 rapidfuzz: pip install rapidfuzz")
+        self.load_default_matching_rules(text_backend)
 
-    def load_default_matching_rules(self):
+    def load_default_matching_rules(self, text_backend: str = 'difflib'):
         """加载默认匹配规则"""
         self.matching_rules = {
             'keywords_weight': 0.5,
             'structure_weight': 0.3,
             'position_weight': 0.2,
-            'min_similarity': 0.1,
+            'text_backend': text_backend,
+            'min_similarity': _DEFAULT_MIN_SIMILARITY[text_backend],
             'content_separators': {
                 'main': '\n--- 子规划内容 ---\n',
                 'sub': '\n\n'
             }
         }
 
-    def merge_plans(self, master_file: str, subplans_dir: str, output_file: str) -> Dict:
-        """整合规划文档"""
+    def merge_plans(self, master_file: str, subplans_dir: str, output_file: str,
+                    max_workers: Optional[int] = None) -> Dict:
+        """
+        整合规划文档
+
+        max_workers 为并行加载子规划的进程数，None 表示由进程池自行决定，1 表示串行加载
+        """
         # 读取总纲文档
-        with open(master_file, 'r', encoding='utf-8') as f:
-            master_content = f.read()
+        master_content = _read_text(master_file)
 
         # 分析总纲结构
         master_structure = self._analyze_document_structure(master_content)
 
         # 读取所有子规划
-        subplans = self._load_subplans(subplans_dir)
+        subplans = self._load_subplans(subplans_dir, max_workers)
 
         # 匹配子规划到总纲章节
         matches = self._match_subplans_to_sections(subplans, master_structure)
 
-        # 生成整合文档
-        merged_content = self._generate_merged_document(
-            master_content, master_structure, matches, subplans
+        # 边生成整合文档边写入文件（总纲只按行拆分这一次），不在内存中保留整篇结果
+        merged_lines = self._iter_merged_lines(
+            master_content.split('\n'), master_structure, matches, subplans
         )
-
-        # 保存结果
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(merged_content)
+            _write_lines(f, merged_lines)
+
+        # 关键词缓存只服务于本次整合，结束后释放
+        _cached_keywords.cache_clear()
 
         # 生成整合报告
         report = {
@@ -71,95 +189,111 @@ class PlanMerger:
     def _analyze_document_structure(self, content: str) -> List[Dict]:
         """分析文档结构"""
         headings = []
-        lines = content.split('\n')
 
-        for i, line in enumerate(lines):
-            match = self.heading_pattern.match(line)
-            if match:
-                level = len(match.group(1))
-                title = match.group(2).strip()
-
-                # 提取章节内容
-                section_content = self._extract_section_content(content, i, level)
-
-                headings.append({
-                    'level': level,
-                    'title': title,
-                    'line_number': i + 1,
-                    'content': section_content,
-                    'keywords': self._extract_keywords(title + ' ' + section_content[:200])
-                })
+        # 整篇一次扫描找出所有标题：(起始偏移, 级别, 标题, 行号, 标题行结束偏移)
+        # 行号按两次匹配之间的换行数累加
+        heading_lines = []
+        line_number = 1
+        pos = 0
+        for match in self.heading_pattern.finditer(content):
+            line_number += content.count('\n', pos, match.start())
+            pos = match.start()
+            heading_lines.append((pos, len(match.group(1)), match.group(2).strip(), line_number, match.end()))
+
+        section_ends = self._find_section_ends(heading_lines, len(content))
+
+        for (_, level, title, line_number, heading_end), end in zip(heading_lines, section_ends):
+            # 提取章节内容
+            section_content = self._extract_section_content(content, heading_end, end)
+
+            headings.append({
+                'level': level,
+                'title': title,
+                'line_number': line_number,
+                'content': section_content,
+                'keywords': list(_cached_keywords(title + ' ' + section_content[:200]))
+            })
 
         return headings
 
-    def _extract_section_content(self, content: str, start_line: int, current_level: int) -> str:
-        """提取章节内容"""
-        lines = content.split('\n')
-        content_lines = []
-
-        # 跳过当前标题行，从下一行开始
-        for i in range(start_line + 1, len(lines)):
-            line = lines[i]
-
-            # 检查是否遇到同级或更高级标题
-            heading_match = self.heading_pattern.match(line)
-            if heading_match:
-                heading_level = len(heading_match.group(1))
-                if heading_level <= current_level:
-                    break
-
-            content_lines.append(line)
-
-        return '\n'.join(content_lines).strip()
+    @staticmethod
+    def _find_section_ends(heading_lines: List[Tuple], content_end: int) -> List[int]:
+        """
+        计算每个章节的结束偏移（下一个同级或更高级标题的起始位置，没有则为文档末尾）
+
+        用单调栈一次遍历完成：栈中是尚未结束的章节，级别自底向上递增
+        """
+        ends = [content_end] * len(heading_lines)
+        open_sections = []
+        for k, (start, level, *_) in enumerate(heading_lines):
+            while open_sections and heading_lines[open_sections[-1]][1] >= level:
+                ends[open_sections.pop()] = start
+            open_sections.append(k)
+        return ends
+
+    def _extract_section_content(self, content: str, heading_end: int, section_end: int) -> str:
+        """提取章节内容（标题行之后到 section_end 之前），直接按偏移切片"""
+        return content[heading_end:section_end].strip()
 
     def _extract_keywords(self, text: str) -> List[str]:
         """提取关键词"""
-        # 使用jieba进行中文分词
-        words = jieba.lcut(text.lower())
-
-        # 过滤停用词和短词
-        stop_words = {'的', '和', '在', '是', '为', '了', '与', '中', '有', '及', '等', '或', '将', '会', '对', '进行', '工作', '规划', '计划'}
-        keywords = [word for word in words if len(word) > 1 and word not in stop_words and word.strip()]
-
-        # 返回前10个最常见的关键词
-        word_freq = {}
-        for word in keywords:
-            word_freq[word] = word_freq.get(word, 0) + 1
-
-        return [word for word, _ in sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]]
-
-    def _load_subplans(self, subplans_dir: str) -> List[Dict]:
-        """加载所有子规划文件"""
-        subplans = []
-        subplan_path = Path(subplans_dir)
-
-        for file_path in subplan_path.glob('*.md'):
-            # 跳过总纲文件（假设总纲文件不在此目录中，或者通过名称排除）
-            if file_path.name.startswith('总纲') or file_path.name.startswith('master'):
-                continue
-
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # 分析子规划结构
-            structure = self._analyze_document_structure(content)
-
-            subplans.append({
-                'name': file_path.stem,
-                'file_path': str(file_path),
-                'content': content,
-                'structure': structure,
-                'keywords': self._extract_keywords(content)
-            })
-
-        return subplans
+        return list(_keywords(text))
+
+    def _load_subplans(self, subplans_dir: str, max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        加载所有子规划文件
+
+        文件数较多时用进程池并行读取和分词，结果顺序与目录遍历顺序一致；
+        每个进程都要重新加载 jieba 词典，文件少时串行处理更快
+        """
+        # 跳过总纲文件（假设总纲文件不在此目录中，或者通过名称排除）
+        file_paths = [
+            file_path for file_path in Path(subplans_dir).glob('*.md')
+            if not (file_path.name.startswith('总纲') or file_path.name.startswith('master'))
+        ]
+
+        if len(file_paths) < _PARALLEL_LOAD_MIN_FILES or max_workers == 1:
+            return [self._load_subplan(file_path) for file_path in file_paths]
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self._load_subplan, file_paths))
+
+    def _load_subplan(self, file_path: Path) -> Dict:
+        """读取并分析单个子规划文件"""
+        content = _read_text(file_path)
+
+        # 分析子规划结构
+        structure = self._analyze_document_structure(content)
+
+        return {
+            'name': file_path.stem,
+            'file_path': str(file_path),
+            'content': content,
+            'structure': structure,
+            'keywords': self._extract_keywords(content)
+        }
 
     def _match_subplans_to_sections(self, subplans: List[Dict], master_structure: List[Dict]) -> List[Dict]:
         """将子规划匹配到总纲章节"""
         matches = []
 
+        # 考虑1-3级标题作为匹配目标；章节的关键词数量与文本比较器在所有子规划间复用
+        text_backend = self.matching_rules.get('text_backend', 'difflib')
+        candidates = [
+            (i, section, len(set(section['keywords'])),
+             _text_scorer(section['title'] + ' ' + section['content'][:500], text_backend))
+            for i, section in enumerate(master_structure)
+            if section['level'] <= 3
+        ]
+
+        # 关键词倒排索引：关键词 -> 包含它的候选章节位置
+        keyword_index = {}
+        for position, (_, section, _, _) in enumerate(candidates):
+            for keyword in set(section['keywords']):
+                keyword_index.setdefault(keyword, []).append(position)
+
         for subplan in subplans:
-            best_match = self._find_best_section_match(subplan, master_structure)
+            best_match = self._find_best_section_match(subplan, candidates, keyword_index)
 
             if best_match and best_match['similarity'] >= self.matching_rules['min_similarity']:
                 matches.append({
@@ -172,17 +306,32 @@ class PlanMerger:
 
         return matches
 
-    def _find_best_section_match(self, subplan: Dict, master_structure: List[Dict]) -> Optional[Dict]:
+    def _find_best_section_match(self, subplan: Dict,
+                                 candidates: List[Tuple[int, Dict, int, Callable[[str, float], float]]],
+                                 keyword_index: Dict[str, List[int]]) -> Optional[Dict]:
         """为子规划找到最佳匹配章节"""
         best_match = None
         max_similarity = 0
 
-        for i, section in enumerate(master_structure):
-            # 考虑1-3级标题作为匹配目标
-            if section['level'] > 3:
-                continue
+        # 子规划的关键词集合与比较文本只计算一次
+        subplan_keywords = set(subplan['keywords'])
+        subplan_text = subplan['content'][:500]
+        min_similarity = self.matching_rules['min_similarity']
+
+        # 通过倒排索引一次性统计与各章节的共同关键词数，没有共同关键词的章节不会出现
+        common_counts = Counter(
+            position for keyword in subplan_keywords for position in keyword_index.get(keyword, ())
+        )
+
+        for position, (i, section, section_keyword_count, text_score) in enumerate(candidates):
+            keyword_similarity = self._keyword_similarity(
+                common_counts[position], len(subplan_keywords), section_keyword_count
+            )
 
-            similarity = self._calculate_similarity(subplan, section)
+            # 分支限界：低于最小相似度或不超过当前最佳的章节不会被采用，无需精确计算
+            similarity = self._calculate_similarity(
+                keyword_similarity, subplan_text, text_score, max(min_similarity, max_similarity)
+            )
 
             if similarity > max_similarity:
                 max_similarity = similarity
@@ -195,30 +344,36 @@ class PlanMerger:
 
         return best_match if max_similarity > 0 else None
 
-    def _calculate_similarity(self, subplan: Dict, section: Dict) -> float:
-        """计算子规划与章节的相似度"""
-        # 关键词相似度
-        subplan_keywords = set(subplan['keywords'])
-        section_keywords = set(section['keywords'])
+    @staticmethod
+    def _keyword_similarity(common: int, subplan_keyword_count: int, section_keyword_count: int) -> float:
+        """关键词集合的 Jaccard 相似度，并集大小由交集推出"""
+        if not subplan_keyword_count or not section_keyword_count:
+            return 0
+        return common / (subplan_keyword_count + section_keyword_count - common)
 
-        if not subplan_keywords or not section_keywords:
-            keyword_similarity = 0
-        else:
-            intersection = subplan_keywords.intersection(section_keywords)
-            union = subplan_keywords.union(section_keywords)
-            keyword_similarity = len(intersection) / len(union) if union else 0
+    def _calculate_similarity(self, keyword_similarity: float, subplan_text: str,
+                              text_score: Callable[[str, float], float],
+                              score_cutoff: float = 0.0) -> float:
+        """
+        计算子规划与章节的相似度
+
+        综合相似度必然低于 score_cutoff 时可能返回一个偏小的值（仍低于 score_cutoff）
+        """
+        keywords_weight = self.matching_rules['keywords_weight']
+        text_weight = 1 - keywords_weight
+
+        # 由综合相似度的下限反推文本相似度的下限，留出浮点误差余量
+        text_cutoff = 0.0
+        if text_weight > 0:
+            text_cutoff = (score_cutoff - keyword_similarity * keywords_weight) / text_weight - 1e-9
 
-        # 文本相似度（使用简单的字符串匹配）
-        text_similarity = SequenceMatcher(
-            None,
-            subplan['content'][:500],
-            section['title'] + ' ' + section['content'][:500]
-        ).ratio()
+        # 文本相似度；即使文本完全相同也达不到下限时不必计算
+        text_similarity = text_score(subplan_text, text_cutoff) if text_cutoff <= 1 else 0.0
 
         # 综合相似度
         total_similarity = (
-            keyword_similarity * self.matching_rules['keywords_weight'] +
-            text_similarity * (1 - self.matching_rules['keywords_weight'])
+            keyword_similarity * keywords_weight +
+            text_similarity * text_weight
         )
 
         return total_similarity
@@ -240,52 +395,51 @@ class PlanMerger:
 
         return "; ".join(reason_parts)
 
-    def _generate_merged_document(self, master_content: str, master_structure: List[Dict],
-                                matches: List[Dict], subplans: List[Dict]) -> str:
-        """生成整合后的文档"""
-        lines = master_content.split('\n')
-        result_lines = []
-
+    def _iter_merged_lines(self, lines: List[str], master_structure: List[Dict],
+                           matches: List[Dict], subplans: List[Dict]) -> Iterator[str]:
+        """逐行生成整合后的文档，按换行符连接即为完整文档"""
         # 创建子规划查找字典
         subplan_dict = {sp['name']: sp for sp in subplans}
 
-        # 按行号排序匹配
-        matches_by_line = sorted(matches,
-                               key=lambda x: master_structure[x['section_index']]['line_number'],
-                               reverse=True)
+        # 按插入行建立索引；同一章节匹配到多个子规划时只插入第一个
+        pending = {}
+        for match in matches:
+            pending.setdefault(master_structure[match['section_index']]['line_number'], match)
 
-        processed_indices = set()
+        if not pending:
+            yield from lines
+            return
 
         for i, line in enumerate(lines):
-            result_lines.append(line)
-
-            # 检查是否是需要插入内容的位置
-            for match in matches_by_line:
-                section_idx = match['section_index']
-                section = master_structure[section_idx]
+            yield line
 
-                if (i == section['line_number'] and
-                    section_idx not in processed_indices):
+            # 检查是否是需要插入内容的位置，插入后即从待处理索引中移除
+            match = pending.pop(i, None)
+            if match is not None:
+                # 插入子规划内容
+                subplan = subplan_dict[match['subplan']]
+                separator = self.matching_rules['content_separators']['main']
 
-                    # 插入子规划内容
-                    subplan = subplan_dict[match['subplan']]
-                    separator = self.matching_rules['content_separators']['main']
+                yield separator
+                yield f"### 📋 {subplan['name']}"
+                yield ""
 
-                    result_lines.append(separator)
-                    result_lines.append(f"### 📋 {subplan['name']}")
-                    result_lines.append("")
+                # 添加子规划内容（跳过空行，整块缩进后作为一行输出）
+                indented_block = self._indent_subplan_content(subplan['content'])
+                if indented_block:
+                    yield indented_block
 
-                    # 添加子规划内容
-                    subplan_lines = subplan['content'].split('\n')
-                    for subline in subplan_lines:
-                        if subline.strip():  # 跳过空行
-                            result_lines.append(f"  {subline}")
+                yield ""
 
-                    result_lines.append("")
-                    processed_indices.add(section_idx)
-                    break
+                # 所有子规划都已插入，其余行原样输出
+                if not pending:
+                    yield from lines[i + 1:]
+                    return
 
-        return '\n'.join(result_lines)
+    @staticmethod
+    def _indent_subplan_content(content: str) -> str:
+        """将子规划内容的非空行缩进两格后拼成一个文本块"""
+        return '\n'.join(f"  {subline}" for subline in content.split('\n') if subline.strip())
 
 
 def main():
@@ -295,10 +449,19 @@ def main():
     parser.add_argument('output_file', help='输出文件路径')
     parser.add_argument('--report', '-r', help='生成匹配报告文件')
     parser.add_argument('--verbose', '-v', action='store_true', help='显示详细信息')
+    parser.add_argument('--text-backend', choices=['difflib', 'rapidfuzz'], default='difflib',
+                        help='文本相似度后端（rapidfuzz 需另行安装，分值与 difflib 不同）')
+    parser.add_argument('--workers', '-j', type=int, default=None,
+                        help=f'子规划文件不少于 {_PARALLEL_LOAD_MIN_FILES} 个时并行加载的进程数（1 表示串行，默认按 CPU 数）')
 
     args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers 必须为正整数")
 
-    merger = PlanMerger()
+    try:
+        merger = PlanMerger(text_backend=args.text_backend)
+    except ImportError as e:
+        parser.error(str(e))
 
     if args.verbose:
         print("🚀 开始整合工作规划...")
@@ -308,7 +471,8 @@ def main():
         print()
 
     try:
-        report = merger.merge_plans(args.master_file, args.subplans_dir, args.output_file)
+        report = merger.merge_plans(args.master_file, args.subplans_dir, args.output_file,
+                                    max_workers=args.workers)
 
         print("✅ 规划整合完成!")
         print(f"📊 处理了 {report['subplans_count']} 个子规划文件")
@@ -335,5 +499,4 @@ def main():
 
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())
\ No newline at end of file